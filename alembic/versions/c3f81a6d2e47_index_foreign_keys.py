@@ -0,0 +1,67 @@
+"""Index foreign keys
+
+Revision ID: c3f81a6d2e47
+Revises: b71d2e5a9c34
+Create Date: 2026-10-16 23:20:11.402118
+
+"""
+from typing import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f81a6d2e47'
+down_revision: str | None = 'b71d2e5a9c34'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# (name, table, columns)
+INDEXES = (
+    ('ix_companies_owner_id', 'companies', ['owner_id']),
+    ('ix_staff_company_id_created_at', 'staff', ['company_id', 'created_at', 'id']),
+    ('ix_events_created_by_id', 'events', ['created_by_id']),
+    ('ix_events_company_id_created_at', 'events', ['company_id', 'created_at', 'id']),
+    ('ix_event_tables_event_id_created_at', 'event_tables', ['event_id', 'created_at', 'id']),
+    ('ix_event_tickets_table_id', 'event_tickets', ['table_id']),
+    ('ix_event_tickets_scanned_by_id', 'event_tickets', ['scanned_by_id']),
+    ('ix_event_attendees_ticket_id', 'event_attendees', ['ticket_id']),
+    ('ix_event_attendees_event_id_created_at', 'event_attendees', ['event_id', 'created_at', 'id']),
+)
+
+
+def is_invalid_index(name: str) -> bool:
+    # A concurrent build that failed leaves an invalid index behind, it's
+    # kept up to date but never used. There's no database to ask offline
+    if op.get_context().as_sql:
+        return False
+
+    return bool(op.get_bind().scalar(
+        sa.text('SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)'),
+        {'name': name},
+    ))
+
+
+def upgrade() -> None:
+    # Indexes are built concurrently so the tables aren't locked against
+    # writes while they're built, which can't be done in a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            if is_invalid_index(name):
+                op.drop_index(name, table_name=table, postgresql_concurrently=True)
+
+            op.create_index(name,
+                            table,
+                            columns,
+                            postgresql_concurrently=True,
+                            if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name,
+                          table_name=table,
+                          postgresql_concurrently=True,
+                          if_exists=True)
@@ -0,0 +1,45 @@
+"""Add ticket code key
+
+Revision ID: f3b8d61c4a92
+Revises: c3f81a6d2e47
+Create Date: 2026-10-17 00:12:45.118320
+
+"""
+import hmac
+from typing import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b8d61c4a92'
+down_revision: str | None = 'c3f81a6d2e47'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column('events', sa.Column('ticket_code_key', sa.String(length=64), nullable=True))
+
+    # Codes were shuffled with a key derived from the secret key, which is
+    # kept with each event so its codes don't move when the secret changes
+    events = sa.table('events', sa.column('id', sa.Integer), sa.column('ticket_code_key', sa.String))
+    connection = op.get_bind()
+    for (event_id,) in connection.execute(sa.select(events.c.id)):
+        key = hmac.digest(settings.secret_key.encode(),
+                          f'event-tickets:{event_id}'.encode(),
+                          'sha256')
+        connection.execute(
+            events.update()
+            .where(events.c.id == event_id)
+            .values(ticket_code_key=key.hex())
+        )
+
+    op.alter_column('events', 'ticket_code_key', nullable=False)
+
+
+def downgrade() -> None:
+    op.drop_column('events', 'ticket_code_key')
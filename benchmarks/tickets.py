@@ -0,0 +1,61 @@
+'''
+Compares the time and size of tickets rendered with each QR code style.
+
+Run it from the project root with:
+
+    python -m benchmarks.tickets
+'''
+
+import argparse
+import io
+import time
+from datetime import datetime
+
+from PIL import Image
+from reportlab.lib.utils import ImageReader
+
+from src.features.events.utils.pdf import QRStyle, TicketTemplate
+
+
+def make_logo() -> ImageReader:
+    image = Image.new('RGB', (600, 200), color=(0, 25, 75))
+    return ImageReader(image)
+
+
+def benchmark(template: TicketTemplate,
+              qr_style: QRStyle,
+              tickets: int) -> tuple[float, float]:
+    '''
+    Returns the average time (in milliseconds) and size (in bytes) of a ticket
+    '''
+
+    table_records = [{'name': 'Jane Doe', 'table': 'Table 3', 'price': 7000}]
+    total_size = 0
+    start = time.perf_counter()
+    for i in range(tickets):
+        pdf_file = io.BytesIO()
+        template.stamp(pdf_file,
+                       code=f'{i:06d}',
+                       table_records=table_records,
+                       qr_style=qr_style)
+        total_size += len(pdf_file.getvalue())
+
+    elapsed = time.perf_counter() - start
+    return elapsed / tickets * 1000, total_size / tickets
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-n', '--tickets', type=int, default=200,
+                        help='The number of tickets rendered per style')
+    args = parser.parse_args()
+
+    template = TicketTemplate(make_logo(),
+                              event_name='OSS Charity Gala 2023',
+                              event_venue='Emara Ole Sereni',
+                              event_date=datetime.now())
+
+    print(f'{"style":<8} {"ms/ticket":>10} {"bytes/ticket":>13}')
+    for qr_style in ('raster', 'vector'):
+        ms, size = benchmark(template, qr_style, args.tickets)
+        print(f'{qr_style:<8} {ms:>10.2f} {size:>13.0f}')
@@ -0,0 +1,53 @@
+'''
+Keyset pagination.
+
+Lists are ordered by ``(created_at, id)`` and a cursor holds the key of the
+last row of a page, so the next page starts right after it no matter how deep
+it is or what was added since.
+'''
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Annotated, NamedTuple
+
+from fastapi import Depends, Query
+
+from src.common.exceptions import BadRequestException
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class PageParams(NamedTuple):
+    cursor: str | None
+    size: int
+
+
+def get_page_params(
+    cursor: Annotated[
+        str | None, Query(description='The next_cursor of the previous page')
+    ] = None,
+    size: Annotated[
+        int, Query(ge=1, le=MAX_PAGE_SIZE, description='The number of items in a page')
+    ] = DEFAULT_PAGE_SIZE,
+) -> PageParams:
+    return PageParams(cursor, size)
+
+
+PageParamsDep = Annotated[PageParams, Depends(get_page_params)]
+
+
+def encode_cursor(created_at: datetime, id: int) -> str:
+    data = json.dumps([created_at.isoformat(), id]).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, id = json.loads(data)
+        return datetime.fromisoformat(created_at), int(id)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise BadRequestException('This page cursor is invalid')
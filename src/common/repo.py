@@ -1,47 +1,138 @@
-from typing import Generic, TypeVar, Generator
+from typing import Annotated, Callable, ClassVar, Generic, Sequence, TypeVar
 
-from sqlalchemy import ColumnExpressionArgument
+from fastapi import Depends
+from sqlalchemy import ColumnExpressionArgument, Select, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Query, Session
+from sqlalchemy.sql.base import ExecutableOption
 
-from src.core.database import BaseModelMixin, SessionLocal
+from src.common.pagination import PageParams, decode_cursor, encode_cursor
+from src.common.schemas import Page
+from src.core.database import BaseModelMixin, get_async_db, get_db
 
 T = TypeVar("T", bound=BaseModelMixin)
 
 
+# Functions returning loader options, like ``selectinload``, by the name of
+# what they load for. They're called on use as the options can't be made
+# before every model is mapped
+LoadingProfiles = dict[str, Callable[[], Sequence[ExecutableOption]]]
+
+
 class RepoBase(Generic[T]):
     model: type[T]
 
+    # The relationships a response schema needs, so they are loaded with the
+    # rows instead of one query per row when they're serialized
+    loading_profiles: ClassVar[LoadingProfiles] = {}
+
     def __init__(self, db: Session):
         self.db = db
 
     def count(self, *criterion: ColumnExpressionArgument[bool]) -> int:
         return self.db.query(self.model).filter(*criterion).count()
 
-    def query(self) -> Query[T]:
-        return self.db.query(self.model)
+    def query(self, profile: str | None = None) -> Query[T]:
+        q = self.db.query(self.model)
+        if profile is not None:
+            q = q.options(*self.loading_profiles[profile]())
+
+        return q
 
-    def get_by_id(self, id: int) -> T | None:
+    def get_by_id(self, id: int, profile: str | None = None) -> T | None:
         model = self.model
-        return self.db.query(model).filter(model.id == id).first()
+        return self.query(profile).filter(model.id == id).first()
 
-    def get_by_column(self, *criterion: ColumnExpressionArgument[bool]) -> T | None:
-        return self.db.query(self.model).filter(*criterion).first()
+    def get_by_column(self,
+                      *criterion: ColumnExpressionArgument[bool],
+                      profile: str | None = None) -> T | None:
+        return self.query(profile).filter(*criterion).first()
 
-    def get_all(self, *criterion: ColumnExpressionArgument[bool]) -> list[T] | None:
-        return self.db.query(self.model).filter(*criterion).all()
+    def get_all(self,
+                *criterion: ColumnExpressionArgument[bool],
+                profile: str | None = None) -> list[T] | None:
+        return self.query(profile).filter(*criterion).all()
 
     def exists(self, *criterion: ColumnExpressionArgument[bool]) -> bool:
         q = self.db.query(self.model).filter(*criterion)
         return self.db.query(q.exists()).scalar()
 
+    def get_page(self,
+                 *criterion: ColumnExpressionArgument[bool],
+                 page: PageParams,
+                 profile: str | None = None) -> Page:
+        '''
+        Gets a page of the rows in the order they were created, see
+        src.common.pagination
+        '''
+
+        model = self.model
+        q = self.query(profile).filter(*criterion)
+        if page.cursor is not None:
+            created_at, id = decode_cursor(page.cursor)
+            q = q.filter(tuple_(model.created_at, model.id) > tuple_(created_at, id))
+
+        # One more row than asked for tells if there's a next page
+        rows = q.order_by(model.created_at, model.id).limit(page.size + 1).all()
+        if len(rows) <= page.size:
+            return Page(items=rows)
+
+        rows = rows[:page.size]
+        return Page(items=rows, next_cursor=encode_cursor(rows[-1].created_at, rows[-1].id))
+
+
+class AsyncRepoBase(Generic[T]):
+    '''
+    The same as RepoBase but on an async session, so the event loop isn't
+    blocked while waiting on the database
+    '''
+
+    model: type[T]
+
+    loading_profiles: ClassVar[LoadingProfiles] = {}
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    def select(self, profile: str | None = None) -> Select[tuple[T]]:
+        stmt = select(self.model)
+        if profile is not None:
+            stmt = stmt.options(*self.loading_profiles[profile]())
+
+        return stmt
+
+    async def count(self, *criterion: ColumnExpressionArgument[bool]) -> int:
+        stmt = select(func.count()).select_from(self.model).filter(*criterion)
+        return await self.db.scalar(stmt) or 0
+
+    async def get_by_id(self, id: int, profile: str | None = None) -> T | None:
+        model = self.model
+        return await self.db.scalar(self.select(profile).filter(model.id == id).limit(1))
+
+    async def get_by_column(self,
+                            *criterion: ColumnExpressionArgument[bool],
+                            profile: str | None = None) -> T | None:
+        return await self.db.scalar(self.select(profile).filter(*criterion).limit(1))
+
+    async def get_all(self,
+                      *criterion: ColumnExpressionArgument[bool],
+                      profile: str | None = None) -> list[T] | None:
+        result = await self.db.scalars(self.select(profile).filter(*criterion))
+        return list(result.unique().all())
+
+    async def exists(self, *criterion: ColumnExpressionArgument[bool]) -> bool:
+        q = select(self.model).filter(*criterion)
+        return bool(await self.db.scalar(select(q.exists())))
+
+
+def get_repo(repo_cls: type[RepoBase[T]] | type[AsyncRepoBase[T]]):
+    if issubclass(repo_cls, AsyncRepoBase):
+        async def async_inner(db: Annotated[AsyncSession, Depends(get_async_db)]) -> AsyncRepoBase[T]:
+            return repo_cls(db)
+
+        return async_inner
 
-def get_repo(repo_cls: type[RepoBase[T]]):
-    def inner() -> Generator[RepoBase[T]]:
-        db = SessionLocal()
-        repo = repo_cls(db)
-        try:
-            yield repo
-        finally:
-            db.close()
+    def inner(db: Annotated[Session, Depends(get_db)]) -> RepoBase[T]:
+        return repo_cls(db)
 
     return inner
@@ -1,7 +1,10 @@
 from datetime import datetime
+from typing import Generic, TypeVar
 
 from pydantic import BaseModel, ConfigDict, Field
 
+T = TypeVar('T')
+
 
 class BaseModelSchema(BaseModel):
     id: int = Field(description='The model id')
@@ -11,3 +14,12 @@ class BaseModelSchema(BaseModel):
 
     model_config = ConfigDict(from_attributes=True)
 
+
+class Page(BaseModel, Generic[T]):
+    '''
+    A page of a list, ``next_cursor`` is passed back to get the next one
+    '''
+
+    items: list[T] = Field(description='The items in this page')
+    next_cursor: str | None = Field(default=None,
+                                    description='The cursor of the next page, empty on the last page')
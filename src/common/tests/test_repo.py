@@ -0,0 +1,87 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+
+from src.common.exceptions import BadRequestException
+from src.common.pagination import PageParams, decode_cursor, encode_cursor
+from src.core.config import settings
+from src.core.database import DBSession, get_async_engine, get_async_sessionmaker
+from src.features.auth.models import UserModel
+from src.features.auth.repo import AsyncUserRepo, UserRepo
+from src.models import Base
+
+NOW = datetime(2026, 10, 16, 20)
+
+
+@pytest.fixture
+def sqlite_url(tmp_path, monkeypatch):
+    url = f'sqlite:///{tmp_path / "curox.db"}'
+    Base.metadata.create_all(create_engine(url))
+
+    monkeypatch.setattr(settings, 'db_url', url)
+    get_async_engine.cache_clear()
+    get_async_sessionmaker.cache_clear()
+    yield url
+    get_async_engine.cache_clear()
+    get_async_sessionmaker.cache_clear()
+
+
+def test_async_repos_read_what_they_add(sqlite_url):
+    async def run():
+        async with get_async_sessionmaker()() as db:
+            repo = AsyncUserRepo(db)
+            db.add(UserModel(email='jane@ac.ac', password='x', first_name='Jane'))
+            await db.commit()
+
+            user = await repo.get_by_column(UserModel.email == 'jane@ac.ac')
+            assert user is not None and user.name == 'Jane'
+            assert await repo.get_by_id(user.id) is user
+            assert await repo.exists(UserModel.email == 'jane@ac.ac')
+            assert not await repo.exists(UserModel.email == 'john@ac.ac')
+            assert await repo.count() == 1
+            assert await repo.get_all() == [user]
+
+        await get_async_engine().dispose()
+
+    asyncio.run(run())
+
+
+def test_databases_without_an_async_driver_fail(monkeypatch):
+    monkeypatch.setattr(settings, 'db_url', 'oracle://x:x@localhost/x')
+    get_async_engine.cache_clear()
+    try:
+        with pytest.raises(ValueError, match='no async driver for oracle'):
+            get_async_engine()
+    finally:
+        get_async_engine.cache_clear()
+
+
+def test_cursors_round_trip():
+    assert decode_cursor(encode_cursor(NOW, 7)) == (NOW, 7)
+
+    for cursor in ('not a cursor', encode_cursor(NOW, 7)[:-3], 'WzFd'):
+        with pytest.raises(BadRequestException):
+            decode_cursor(cursor)
+
+
+def test_pages_follow_on_from_their_cursor(sqlite_url):
+    db = DBSession(bind=create_engine(sqlite_url))
+    # Users created at the same time are ordered by id
+    db.add_all(UserModel(email=f'user{i}@ac.ac', password='x', created_at=NOW, updated_at=NOW)
+               for i in range(5))
+    db.commit()
+
+    repo = UserRepo(db)
+    emails: list[str] = []
+    cursor = None
+    while True:
+        page = repo.get_page(page=PageParams(cursor, size=2))
+        emails.extend(user.email for user in page.items)
+        if page.next_cursor is None:
+            break
+        cursor = page.next_cursor
+
+    assert emails == [f'user{i}@ac.ac' for i in range(5)]
+    db.close()
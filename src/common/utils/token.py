@@ -1,12 +1,22 @@
+import hashlib
 import string
 import random
 
+TOKEN_CHARACTERS = string.ascii_uppercase + string.digits
+
+# The character pool of each position of a token
+TOKEN_POOLS = (TOKEN_CHARACTERS,) * 2 + (string.digits,) * 2 + (TOKEN_CHARACTERS,) * 2
+
+# The number of distinct tokens
+TOKEN_SPACE = len(TOKEN_CHARACTERS) ** 4 * len(string.digits) ** 2
+
+
 def generate_token() -> str:
     '''
     Generates a random 6-character token
     '''
 
-    character_pool = string.ascii_uppercase + string.digits
+    character_pool = TOKEN_CHARACTERS
     token = ''.join(random.choice(character_pool) for _ in range(2))
 
     # This ensures we can't have above 2 consecetive letters which may form "interesting" unintentional words
@@ -14,3 +24,61 @@ def generate_token() -> str:
 
     token += ''.join(random.choice(character_pool) for _ in range(2))
     return token
+
+
+def encode_token(index: int) -> str:
+    '''
+    Encodes a number in [0, TOKEN_SPACE) as a token in the same format as
+    ``generate_token``
+    '''
+
+    if not 0 <= index < TOKEN_SPACE:
+        raise ValueError(f'The token index must be in [0, {TOKEN_SPACE})')
+
+    characters: list[str] = []
+    for pool in reversed(TOKEN_POOLS):
+        index, position = divmod(index, len(pool))
+        characters.append(pool[position])
+
+    return ''.join(reversed(characters))
+
+
+class TokenPermutation:
+    '''
+    A keyed shuffle of every possible token.
+
+    Maps the sequence numbers 0, 1, 2... to tokens that look random but never
+    repeat, so tokens can be handed out without checking if they're taken.
+    This is a 4 round Feistel network over 28 bits which is walked until it
+    lands inside TOKEN_SPACE.
+    '''
+
+    rounds = 4
+    half_bits = 14
+
+    def __init__(self, key: bytes):
+        self.key = hashlib.sha256(key).digest()
+        self.mask = (1 << self.half_bits) - 1
+
+    def _round(self, i: int, half: int) -> int:
+        digest = hashlib.blake2b(bytes([i]) + half.to_bytes(2, 'big'),
+                                 key=self.key,
+                                 digest_size=4).digest()
+        return int.from_bytes(digest, 'big') & self.mask
+
+    def permute(self, index: int) -> int:
+        if not 0 <= index < TOKEN_SPACE:
+            raise ValueError(f'The token index must be in [0, {TOKEN_SPACE})')
+
+        value = index
+        while True:
+            left, right = value >> self.half_bits, value & self.mask
+            for i in range(self.rounds):
+                left, right = right, left ^ self._round(i, right)
+
+            value = (left << self.half_bits) | right
+            if value < TOKEN_SPACE:
+                return value
+
+    def token(self, index: int) -> str:
+        return encode_token(self.permute(index))
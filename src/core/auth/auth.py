@@ -1,6 +1,27 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from fastapi import status
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
+from src.common.exceptions import CustomHTTPException
+from src.core.config import settings
+
+pwd_context = CryptContext(schemes=['bcrypt'],
+                           deprecated='auto',
+                           bcrypt__rounds=settings.bcrypt_rounds)
+
+# bcrypt releases the GIL, so hashing runs in parallel on these threads
+# without blocking the event loop
+_hashing_pool = ThreadPoolExecutor(max_workers=settings.password_hashing_workers,
+                                   thread_name_prefix='password-hashing')
+_hashing_queue_depth = 0
+_hashing_queue_lock = threading.Lock()
+
+T = TypeVar('T')
+
 
 def verify_password(password: str, hashed_password: str):
     '''
@@ -16,3 +37,35 @@ def hash_password(password: str):
 
     return pwd_context.hash(password)
 
+def get_hashing_metrics() -> dict[str, int]:
+    return {
+        'workers': settings.password_hashing_workers,
+        'queue_depth': _hashing_queue_depth,
+        'max_queue_depth': settings.password_hashing_max_queue,
+    }
+
+async def _run_hashing(func: Callable[..., T], *args) -> T:
+    global _hashing_queue_depth
+
+    with _hashing_queue_lock:
+        if _hashing_queue_depth >= settings.password_hashing_max_queue:
+            raise CustomHTTPException(status.HTTP_503_SERVICE_UNAVAILABLE,
+                                      'The server is busy, please try again')
+        _hashing_queue_depth += 1
+
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hashing_pool, func, *args)
+    finally:
+        with _hashing_queue_lock:
+            _hashing_queue_depth -= 1
+
+async def verify_password_async(password: str, hashed_password: str) -> tuple[bool, str | None]:
+    '''
+    Verifies a password on the hashing pool.
+
+    Also returns a new hash of the password if the hash was made with
+    different settings, like an older bcrypt cost, and should be replaced.
+    '''
+
+    return await _run_hashing(pwd_context.verify_and_update, password, hashed_password)
@@ -6,6 +6,7 @@ from src.features.auth.models import UserModel
 from src.features.auth.repo import UserRepo
 
 from .jwt import decode_jwt
+from .principal import principal_cache
 
 
 class BearerTokenAuthBackend(AuthenticationBackend):
@@ -35,16 +36,23 @@ class BearerTokenAuthBackend(AuthenticationBackend):
         except Exception:
             return None
 
-        user_id = decoded["sub"].split(":")[-1]
+        # Kept so that JWTBearer doesn't decode the token again
+        conn.state.jwt_claims = decoded
 
-        db = SessionLocal()
-        try:
-            repo = UserRepo(db)
-            user = repo.get_by_id(user_id)
-        finally:
-            db.close()
+        user_id = int(decoded["sub"].split(":")[-1])
 
+        generation, user = principal_cache.get(user_id)
         if user is None:
-            return None
+            db = SessionLocal()
+            try:
+                repo = UserRepo(db)
+                user = repo.get_by_id(user_id)
+            finally:
+                db.close()
+
+            if user is None:
+                return None
+
+            principal_cache.set(user, generation)
 
         return AuthCredentials(["authenticated"]), user
@@ -1,3 +1,5 @@
+from typing import Any
+
 from fastapi import HTTPException, Request, status
 from fastapi.security import HTTPBearer
 
@@ -8,11 +10,12 @@ class JWTBearer(HTTPBearer):
     def __init__(self, auto_error: bool = True):
         super().__init__(auto_error=auto_error)
 
-    def verify_jwt(self, token: str) -> bool:
+    def verify_jwt(self, token: str, decoded_token: dict[str, Any] | None = None) -> bool:
         is_valid = False
 
         try:
-            decoded_token = decode_jwt(token)
+            if decoded_token is None:
+                decoded_token = decode_jwt(token)
 
             if decoded_token:
                 is_valid = decoded_token["type"] == "access"
@@ -35,7 +38,9 @@ class JWTBearer(HTTPBearer):
                 detail="Invalid authentication scheme",
             )
 
-        if not self.verify_jwt(credentials.credentials):
+        # The auth backend has already decoded the token if it's valid
+        decoded_token = getattr(request.state, "jwt_claims", None)
+        if not self.verify_jwt(credentials.credentials, decoded_token):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Invalid authorization code",
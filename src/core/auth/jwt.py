@@ -1,4 +1,6 @@
+from collections import OrderedDict
 from datetime import datetime, timedelta
+import threading
 import time
 from typing import Any
 
@@ -15,9 +17,20 @@ class TokenPair(BaseModel):
     refresh: str
 
 
-def create_token_pair(user_id: int, role: StaffRole) -> TokenPair:
+def create_token_pair(
+    user_id: int,
+    role: StaffRole,
+    staff_id: int | None = None,
+    company_id: int | None = None,
+    company_ids: list[int] | None = None,
+) -> TokenPair:
     """
     Creates a new token pair
+
+    The access token carries the staff id and company of staff users and
+    the ids of the companies a user owns, so permissions can be checked
+    without the database. Nothing in the API takes permissions away, those
+    changed in the database apply to tokens issued afterwards.
     """
 
     now = datetime.now(tz=pendulum.UTC)
@@ -30,6 +43,9 @@ def create_token_pair(user_id: int, role: StaffRole) -> TokenPair:
         "exp": access_expires_delta,
         "iat": now,
         "role": role.value,
+        "staff_id": staff_id,
+        "company_id": company_id,
+        "company_ids": company_ids or [],
     }
     access_token = jwt.encode(
         to_encode,
@@ -53,17 +69,45 @@ def create_token_pair(user_id: int, role: StaffRole) -> TokenPair:
     return TokenPair(access=access_token, refresh=refresh_token)
 
 
+# The number of verified tokens remembered so they aren't verified again
+VERIFIED_TOKEN_CACHE_SIZE = 1024
+
+_verified_tokens: OrderedDict[str, dict[str, Any]] = OrderedDict()
+_verified_tokens_lock = threading.Lock()
+
+
 def decode_jwt(token: str) -> dict[str, Any] | None:
     """
     Decodes a jwt token
+
+    Tokens that were recently verified are not verified again, only their
+    expiry is checked.
     """
 
+    with _verified_tokens_lock:
+        decoded_token = _verified_tokens.get(token)
+        if decoded_token is not None:
+            if decoded_token["exp"] >= time.time():
+                _verified_tokens.move_to_end(token)
+                return decoded_token
+
+            del _verified_tokens[token]
+            return None
+
     try:
         decoded_token = jwt.decode(
             token,
             settings.secret_key,
             algorithms=[settings.jwt_algorithm],
         )
-        return decoded_token if decoded_token["exp"] >= time.time() else None
+        if decoded_token["exp"] < time.time():
+            return None
     except Exception:
         return None
+
+    with _verified_tokens_lock:
+        _verified_tokens[token] = decoded_token
+        while len(_verified_tokens) > VERIFIED_TOKEN_CACHE_SIZE:
+            _verified_tokens.popitem(last=False)
+
+    return decoded_token
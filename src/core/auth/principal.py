@@ -0,0 +1,156 @@
+"""
+Caches the users that requests are authenticated as so that identifying the
+caller doesn't need the database on every request.
+"""
+
+import fnmatch
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any
+
+from src.core.cache import (CACHE_INVALIDATION_CHANNEL, CacheManager,
+                            InvalidationListener, get_redis_client)
+from src.core.config import settings
+from src.core.logger import logger
+from src.features.auth.models import UserModel
+
+# The columns kept of a user, secrets like the password are left out
+PRINCIPAL_COLUMNS = (
+    "id",
+    "email",
+    "first_name",
+    "last_name",
+    "phone_number",
+    "is_active",
+    "avatar_path",
+    "should_reset_password",
+    "created_at",
+    "updated_at",
+)
+
+PRINCIPAL_KEY_PREFIX = "auth:principals:"
+
+
+class PrincipalCache(InvalidationListener):
+    """
+    An in-process LRU of users with an optional redis tier.
+
+    Users are rebuilt as transient models, so only their columns can be
+    used. With the redis tier, invalidating a user clears it and drops the
+    user in every process, the same way as LocalCache. Without it, other
+    processes keep the user until it expires.
+    """
+
+    def __init__(self, ttl: int, size: int, use_redis: bool):
+        super().__init__("principal-invalidations")
+        self.ttl = ttl
+        self.size = size
+        self.use_redis = use_redis
+        self._lock = threading.Lock()
+        self._users: OrderedDict[int, tuple[float, dict[str, Any]]] = OrderedDict()
+        # Bumped on every invalidation so reads that raced one aren't kept
+        self._generation = 0
+
+    def _get_key(self, user_id: int) -> str:
+        return f"{PRINCIPAL_KEY_PREFIX}{user_id}"
+
+    def evict(self, keys: list[str]):
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                if key.startswith(PRINCIPAL_KEY_PREFIX):
+                    self._users.pop(int(key.removeprefix(PRINCIPAL_KEY_PREFIX)), None)
+
+    def evict_pattern(self, pattern: str):
+        with self._lock:
+            self._generation += 1
+            for user_id in list(self._users):
+                if fnmatch.fnmatchcase(self._get_key(user_id), pattern):
+                    del self._users[user_id]
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._users.clear()
+
+    def _build(self, columns: dict[str, Any]) -> UserModel:
+        return UserModel(**columns)
+
+    def _remember(self, user_id: int, columns: dict[str, Any], generation: int) -> bool:
+        with self._lock:
+            if generation != self._generation:
+                return False
+
+            self._users[user_id] = (time.monotonic() + self.ttl, columns)
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.size:
+                self._users.popitem(last=False)
+
+        return True
+
+    def get(self, user_id: int) -> tuple[int, UserModel | None]:
+        """
+        Get a user, or None, and the generation to set the user with on a
+        miss
+        """
+        if self.use_redis:
+            self.start()
+
+        with self._lock:
+            generation = self._generation
+            # Invalidations from other processes are missed while the
+            # subscription is down
+            serving = not self.use_redis or self._listening.is_set()
+            entry = self._users.get(user_id) if serving else None
+            if entry is not None:
+                expires_at, columns = entry
+                if expires_at > time.monotonic():
+                    self._users.move_to_end(user_id)
+                    return generation, self._build(columns)
+
+                del self._users[user_id]
+
+        if not self.use_redis:
+            return generation, None
+
+        columns = CacheManager[dict[str, Any]]().get(self._get_key(user_id))
+        if columns is None:
+            return generation, None
+
+        for column in ("created_at", "updated_at"):
+            columns[column] = datetime.fromisoformat(columns[column])
+        self._remember(user_id, columns, generation)
+        return generation, self._build(columns)
+
+    def set(self, user: UserModel, generation: int):
+        """Keep a user read from the database unless it was invalidated since"""
+        columns = {column: getattr(user, column) for column in PRINCIPAL_COLUMNS}
+        if not self._remember(user.id, columns, generation):
+            return
+
+        if self.use_redis:
+            CacheManager[dict[str, Any]]().set(
+                self._get_key(user.id), columns, ttl=self.ttl
+            )
+
+    def invalidate(self, user_id: int):
+        key = self._get_key(user_id)
+        self.evict([key])
+
+        if not self.use_redis:
+            return
+
+        CacheManager[dict[str, Any]]().delete(key)
+        try:
+            get_redis_client().publish(CACHE_INVALIDATION_CHANNEL, self._get_message(keys=[key]))
+        except Exception as e:
+            logger.error("Could not drop user '{}' in the other processes: {}", user_id, e)
+
+
+principal_cache = PrincipalCache(
+    ttl=settings.principal_cache_ttl,
+    size=settings.principal_cache_size,
+    use_redis=settings.principal_cache_redis,
+)
@@ -1,11 +1,38 @@
+import fnmatch
 import json
-from typing import Annotated, Any, TypeVar, Generic
+import math
+import random
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Annotated, Any, Callable, Generic, Iterator, TypeVar
 
 import redis
+import redis.asyncio
 
 from fastapi import Depends
+from pydantic import TypeAdapter
 
+from src.core.codecs import get_value_codec
 from src.core.config import settings
+from src.core.logger import logger
+
+def get_redis_connection_options(decode_responses: bool = True) -> dict[str, Any]:
+    return dict(
+        host=settings.redis_host,
+        port=settings.redis_port,
+        db=settings.redis_db,
+        decode_responses=decode_responses,
+        max_connections=settings.redis_max_connections,
+        socket_timeout=settings.redis_socket_timeout,
+        socket_connect_timeout=settings.redis_connect_timeout,
+        health_check_interval=settings.redis_health_check_interval,
+    )
+
 
 # Redis client singleton
 _redis_client: redis.Redis | None = None
@@ -15,38 +42,381 @@ def get_redis_client() -> redis.Redis:
     """Get or create Redis client"""
     global _redis_client
     if _redis_client is None:
-        _redis_client = redis.Redis(
-            host=settings.redis_host,
-            port=settings.redis_port,
-            db=settings.redis_db,
-            decode_responses=True,
-        )
+        pool = redis.ConnectionPool(**get_redis_connection_options())
+        _redis_client = redis.Redis(connection_pool=pool)
     return _redis_client
 
 
+# Cached values are encoded as bytes, see src.core.codecs. Async code only
+# has this client, so each process opens an async pool at most
+_binary_redis_client: redis.Redis | None = None
+_async_binary_redis_client: redis.asyncio.Redis | None = None
+
+
+def get_binary_redis_client() -> redis.Redis:
+    """Get or create Redis client that doesn't decode responses"""
+    global _binary_redis_client
+    if _binary_redis_client is None:
+        pool = redis.ConnectionPool(**get_redis_connection_options(decode_responses=False))
+        _binary_redis_client = redis.Redis(connection_pool=pool)
+    return _binary_redis_client
+
+
+def get_async_binary_redis_client() -> redis.asyncio.Redis:
+    """Get or create async Redis client that doesn't decode responses"""
+    global _async_binary_redis_client
+    if _async_binary_redis_client is None:
+        pool = redis.asyncio.ConnectionPool(**get_redis_connection_options(decode_responses=False))
+        _async_binary_redis_client = redis.asyncio.Redis(connection_pool=pool)
+    return _async_binary_redis_client
+
+
+# Where processes tell each other which cache keys to drop
+CACHE_INVALIDATION_CHANNEL = "cache:invalidations"
+
+# What LocalCache.get returns for keys it doesn't have, None is kept for keys
+# that aren't in redis either
+MISSING = object()
+
+
+class InvalidationListener(ABC):
+    """
+    Drops what a process keeps in memory when it's invalidated in any
+    process, through CACHE_INVALIDATION_CHANNEL. Subclasses say how it's
+    dropped.
+
+    While the subscription is down, invalidations are missed, so nothing
+    kept should be served.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        # Tells this process's invalidations apart from the others
+        self.origin = uuid.uuid4().hex
+        self._listening = threading.Event()
+        self._listener: threading.Thread | None = None
+        self._listener_lock = threading.Lock()
+
+    @abstractmethod
+    def evict(self, keys: list[str]):
+        """Drop keys kept in memory"""
+
+    @abstractmethod
+    def evict_pattern(self, pattern: str):
+        """Drop the keys kept in memory that match pattern"""
+
+    @abstractmethod
+    def clear(self):
+        """Drop everything kept in memory"""
+
+    def start(self):
+        with self._listener_lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen,
+                                                  name=self.name,
+                                                  daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        delay = 1
+        while True:
+            pubsub = get_redis_client().pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(CACHE_INVALIDATION_CHANNEL)
+                # Invalidations were missed while unsubscribed
+                self.clear()
+                self._listening.set()
+                delay = 1
+
+                while True:
+                    # Waits a second at most, commands time out after
+                    # settings.redis_socket_timeout
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is not None:
+                        self._handle(message["data"])
+            except Exception as e:
+                logger.warning("Invalidations are down for {}, retrying in {}s: {}", self.name, delay, e)
+            finally:
+                self._listening.clear()
+                self.clear()
+                pubsub.close()
+
+            time.sleep(delay)
+            delay = min(delay * 2, 30)
+
+    def _handle(self, data: str):
+        message = json.loads(data)
+        if message["origin"] == self.origin:
+            return
+
+        if "pattern" in message:
+            self.evict_pattern(message["pattern"])
+        else:
+            self.evict(message["keys"])
+
+    def _get_message(self, keys: list[str] | None = None, pattern: str | None = None) -> str:
+        """Get the message that drops keys, or the keys matching pattern"""
+        if pattern is not None:
+            return json.dumps({"origin": self.origin, "pattern": pattern})
+
+        return json.dumps({"origin": self.origin, "keys": keys})
+
+
+class LocalCache(InvalidationListener):
+    """
+    An in-process LRU in front of redis for the namespaces, the part of a key
+    before the first colon, in settings.cache_local_sizes.
+
+    Entries are kept for settings.cache_local_ttl seconds at most. Writes
+    anywhere drop the key in every process through
+    CACHE_INVALIDATION_CHANNEL, and nothing is served from here while that
+    subscription is down.
+    """
+
+    def __init__(self, sizes: dict[str, int], ttl: int):
+        super().__init__("cache-invalidations")
+        self.sizes = sizes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: dict[str, OrderedDict[str, tuple[float, str]]] = {
+            namespace: OrderedDict() for namespace in sizes
+        }
+        # Bumped on every invalidation so reads that raced one aren't kept
+        self._generation = 0
+        self._hits: Counter[str] = Counter()
+        self._misses: Counter[str] = Counter()
+
+    def _get_namespace(self, key: str) -> str | None:
+        namespace = key.split(":", 1)[0]
+        return namespace if namespace in self.sizes else None
+
+    def get(self, key: str) -> tuple[int, Any]:
+        """
+        Get a raw value, or MISSING, and the generation to fill the key with
+        on a miss
+        """
+        namespace = self._get_namespace(key)
+        with self._lock:
+            generation = self._generation
+            if namespace is None or not self._listening.is_set():
+                return generation, MISSING
+
+            entries = self._entries[namespace]
+            entry = entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    entries.move_to_end(key)
+                    self._hits[namespace] += 1
+                    return generation, value
+
+                del entries[key]
+
+            self._misses[namespace] += 1
+            return generation, MISSING
+
+    def fill(self, key: str, value: str | bytes | None, generation: int):
+        """Keep a value read from redis unless it was invalidated since"""
+        namespace = self._get_namespace(key)
+        with self._lock:
+            if namespace is None or generation != self._generation:
+                return
+
+            entries = self._entries[namespace]
+            entries[key] = (time.monotonic() + self.ttl, value)
+            entries.move_to_end(key)
+            while len(entries) > self.sizes[namespace]:
+                entries.popitem(last=False)
+
+    def evict(self, keys: list[str]):
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                namespace = self._get_namespace(key)
+                if namespace is not None:
+                    self._entries[namespace].pop(key, None)
+
+    def evict_pattern(self, pattern: str):
+        with self._lock:
+            self._generation += 1
+            for entries in self._entries.values():
+                for key in fnmatch.filter(list(entries), pattern):
+                    del entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            for entries in self._entries.values():
+                entries.clear()
+
+    def invalidate(self, keys: list[str] | None = None, pattern: str | None = None) -> str | None:
+        """
+        Drop keys, or the keys matching pattern, and get the message that
+        drops them in the other processes
+        """
+        if pattern is not None:
+            self.evict_pattern(pattern)
+            return self._get_message(pattern=pattern)
+
+        keys = [key for key in keys or [] if self._get_namespace(key) is not None]
+        if not keys:
+            return None
+
+        self.evict(keys)
+        return self._get_message(keys=keys)
+
+    def get_metrics(self) -> dict[str, Any]:
+        with self._lock:
+            namespaces = {
+                namespace: {
+                    "hits": self._hits[namespace],
+                    "misses": self._misses[namespace],
+                    "size": len(entries),
+                    "max_size": self.sizes[namespace],
+                }
+                for namespace, entries in self._entries.items()
+            }
+
+        return {"listening": self._listening.is_set(), "namespaces": namespaces}
+
+
+_local_cache: LocalCache | None = None
+_local_cache_lock = threading.Lock()
+
+
+def get_local_cache() -> LocalCache | None:
+    """Get the local cache tier, if it's enabled"""
+    global _local_cache
+    if not settings.cache_local_enabled:
+        return None
+
+    with _local_cache_lock:
+        if _local_cache is None:
+            _local_cache = LocalCache(settings.cache_local_sizes, settings.cache_local_ttl)
+            _local_cache.start()
+
+    return _local_cache
+
+
+def get_cache_metrics() -> dict[str, Any]:
+    local = get_local_cache()
+    return {"local": local.get_metrics() if local is not None else None}
+
+
 T = TypeVar("T")
 
 
+@lru_cache(maxsize=64)
+def get_type_adapter(value_type: Any) -> TypeAdapter[Any]:
+    return TypeAdapter(value_type)
+
+
+# Deletes a lock only if it's still held by whoever took it
+# KEYS: the lock
+# ARGV: the token it was taken with
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# The keys being computed in this process, with how many threads want each
+_computing: dict[str, tuple[threading.Lock, list[int]]] = {}
+_computing_lock = threading.Lock()
+
+
+@contextmanager
+def _single_flight(key: str, timeout: float) -> Iterator[bool]:
+    """
+    Let one thread of this process at a time compute a key, yields whether
+    this is the one. The others wait up to timeout seconds for it to be
+    done, and get False if it isn't by then.
+    """
+    with _computing_lock:
+        lock, waiters = _computing.setdefault(key, (threading.Lock(), [0]))
+        waiters[0] += 1
+
+    if timeout > 0:
+        acquired = lock.acquire(timeout=timeout)
+    else:
+        acquired = lock.acquire(blocking=False)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            lock.release()
+        with _computing_lock:
+            waiters[0] -= 1
+            if waiters[0] == 0:
+                del _computing[key]
+
+
 class CacheManager(Generic[T]):
     """Simple cache manager for Redis operations"""
 
-    def __init__(self, ttl: int = 3600):
+    def __init__(self, ttl: int = 3600, value_type: Any = None):
         """
         Initialize cache manager
 
         Args:
             ttl: Time to live in seconds (default: 1 hour)
+            value_type: The type of the values, like a pydantic model, they
+                're validated as when read
         """
         self.redis = get_redis_client()
+        self.values = get_binary_redis_client()
+        self.local = get_local_cache()
+        self.codec = get_value_codec()
+        self.adapter = get_type_adapter(value_type) if value_type is not None else None
         self.ttl = ttl
 
+    def _get_raw(self, keys: list[str], client: redis.Redis) -> list[Any]:
+        """Get raw values from the local tier, and the rest from redis"""
+        if self.local is None:
+            return client.mget(keys)
+
+        local = [self.local.get(key) for key in keys]
+        missing = [key for key, (_, value) in zip(keys, local) if value is MISSING]
+        fetched = dict(zip(missing, client.mget(missing))) if missing else {}
+
+        values = []
+        for key, (generation, value) in zip(keys, local):
+            if value is MISSING:
+                value = fetched[key]
+                self.local.fill(key, value, generation)
+            values.append(value)
+
+        return values
+
+    def _invalidate_local(self, keys: list[str] | None = None, pattern: str | None = None):
+        if self.local is None:
+            return
+
+        message = self.local.invalidate(keys=keys, pattern=pattern)
+        if message is not None:
+            self.redis.publish(CACHE_INVALIDATION_CHANNEL, message)
+
+    def _dump(self, value: Any) -> Any:
+        return self.adapter.dump_python(value, mode="json") if self.adapter else value
+
+    def _load(self, value: Any) -> Any:
+        return self.adapter.validate_python(value) if self.adapter else value
+
+    def _read(self, key: str) -> Any:
+        """Get a decoded value, without validating it"""
+        value = self._get_raw([key], self.values)[0]
+        return self.codec.decode(value) if value else None
+
+    def _write(self, key: str, value: Any, ttl: int | None = None):
+        self.values.setex(key, ttl or self.ttl, self.codec.encode(value))
+        self._invalidate_local(keys=[key])
+
     def get(self, key: str) -> T | None:
         """Get value from cache"""
         try:
-            value = self.redis.get(key)
-            if value:
-                return json.loads(value)
-            return None
+            value = self._read(key)
+            return self._load(value) if value is not None else None
         except Exception as e:
             print(f"Cache get error for key {key}: {e}")
             return None
@@ -54,11 +424,7 @@ class CacheManager(Generic[T]):
     def set(self, key: str, value: Any, ttl: int | None = None) -> bool:
         """Set value in cache"""
         try:
-            self.redis.setex(
-                key,
-                ttl or self.ttl,
-                json.dumps(value, default=str),
-            )
+            self._write(key, self._dump(value), ttl)
             return True
         except Exception as e:
             print(f"Cache set error for key {key}: {e}")
@@ -67,27 +433,377 @@ class CacheManager(Generic[T]):
     def delete(self, key: str) -> bool:
         """Delete value from cache"""
         try:
-            self.redis.delete(key)
+            self.values.delete(key)
+            self._invalidate_local(keys=[key])
             return True
         except Exception as e:
             print(f"Cache delete error for key {key}: {e}")
             return False
 
-    def clear_pattern(self, pattern: str) -> int:
-        """Delete all keys matching pattern"""
+    def _should_refresh(self, entry: dict[str, Any], beta: float) -> bool:
+        # Refreshes early at random, more likely the closer it is to expiring
+        # and the longer it took to compute, see "Optimal Probabilistic
+        # Cache Stampede Prevention"
+        early = -entry["delta"] * beta * math.log(1 - random.random())
+        return time.time() + early >= entry["expires_at"]
+
+    def _lock(self, key: str, timeout: int) -> str | None:
+        """Take the lock of a key, None if someone else has it"""
+        token = uuid.uuid4().hex
         try:
-            keys = self.redis.keys(pattern)
-            if keys:
-                return self.redis.delete(*keys)
-            return 0
+            if self.redis.set(f"{key}:lock", token, nx=True, ex=timeout):
+                return token
+            return None
+        except Exception as e:
+            # Better to compute it more than once than not at all
+            print(f"Cache lock error for key {key}: {e}")
+            return ""
+
+    def _unlock(self, key: str, token: str):
+        try:
+            self.redis.eval(RELEASE_LOCK_SCRIPT, 1, f"{key}:lock", token)
+        except Exception as e:
+            print(f"Cache unlock error for key {key}: {e}")
+
+    def _get_entry(self, key: str) -> dict[str, Any] | None:
+        try:
+            entry = self._read(key)
+            if entry is not None:
+                entry["value"] = self._load(entry["value"])
+            return entry
+        except Exception as e:
+            print(f"Cache get error for key {key}: {e}")
+            return None
+
+    def _wait_for(self, key: str, timeout: int) -> dict[str, Any] | None:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            entry = self._get_entry(key)
+            if entry is not None:
+                return entry
+
+        return None
+
+    def get_or_compute(self,
+                       key: str,
+                       compute: Callable[[], T],
+                       ttl: int | None = None,
+                       stale_ttl: int = 0,
+                       lock_timeout: int = 10,
+                       beta: float = 1.0) -> T:
+        """
+        Get a value from cache, or compute and cache it once no matter how
+        many requests miss it at the same time
+
+        Entries are refreshed a little before they expire, so popular keys
+        rarely expire at all. With stale_ttl, an expired entry is still
+        served for that long to everyone but the one request refreshing it.
+        Keys have to be only used through this, entries are kept with when
+        they expire.
+
+        Args:
+            compute: Gets the value, of value_type if there's one
+            lock_timeout: How long, in seconds, computing can take before
+                others stop waiting and compute it too, or serve what's
+                stale
+            beta: Above 1 refreshes earlier, below 1 later
+        """
+        ttl = ttl or self.ttl
+        entry = self._get_entry(key)
+        if entry is not None and not self._should_refresh(entry, beta):
+            return entry["value"]
+
+        # With an entry to fall back on nobody has to wait
+        with _single_flight(key, timeout=0 if entry is not None else lock_timeout) as leader:
+            if not leader and entry is not None:
+                return entry["value"]
+
+            # It may have been computed while this thread waited
+            if entry is None:
+                entry = self._get_entry(key)
+                if entry is not None:
+                    return entry["value"]
+
+            # Waiting timed out, so whoever is computing it is stuck and it's
+            # computed here without waiting on them again
+            token = self._lock(key, lock_timeout) if leader else ""
+            if token is None:
+                if entry is None:
+                    entry = self._wait_for(key, lock_timeout)
+                if entry is not None:
+                    return entry["value"]
+
+            try:
+                started_at = time.monotonic()
+                value = compute()
+                entry = {
+                    "value": self._dump(value),
+                    "delta": time.monotonic() - started_at,
+                    "expires_at": time.time() + ttl,
+                }
+                try:
+                    self._write(key, entry, ttl=ttl + stale_ttl)
+                except Exception as e:
+                    print(f"Cache set error for key {key}: {e}")
+                return value
+            finally:
+                if token:
+                    self._unlock(key, token)
+
+    def _get_tag_key(self, tag: str) -> str:
+        return f"cache:tag:{tag}"
+
+    def get_tagged_key(self, key: str, *tags: str) -> str:
+        """
+        Get a key that holds the generation of each tag, so invalidating any
+        of the tags moves the key on and what was cached under it is left to
+        expire
+        """
+        try:
+            generations = self._get_raw([self._get_tag_key(tag) for tag in tags], self.redis)
+        except Exception as e:
+            print(f"Cache tag error for key {key}: {e}")
+            generations = []
+
+        return ":".join([key, *(generation or "0" for generation in generations)])
+
+    def invalidate_tags(self, *tags: str) -> bool:
+        """Invalidate everything cached under the tags"""
+        try:
+            # The generations don't expire, one that started over could
+            # reach keys that haven't expired yet
+            tag_keys = [self._get_tag_key(tag) for tag in tags]
+            pipe = self.redis.pipeline(transaction=False)
+            for tag_key in tag_keys:
+                pipe.incr(tag_key)
+            pipe.execute()
+            self._invalidate_local(keys=tag_keys)
+            return True
+        except Exception as e:
+            print(f"Cache invalidate error for tags {tags}: {e}")
+            return False
+
+    def clear_pattern(self, pattern: str, batch_size: int = 500) -> int:
+        """
+        Delete all keys matching pattern
+
+        This walks the whole keyspace, in batches so redis isn't blocked, use
+        tags to invalidate instead.
+        """
+        try:
+            deleted = 0
+            batch: list[str] = []
+            for key in self.redis.scan_iter(match=pattern, count=batch_size):
+                batch.append(key)
+                if len(batch) >= batch_size:
+                    deleted += self.redis.unlink(*batch)
+                    batch = []
+
+            if batch:
+                deleted += self.redis.unlink(*batch)
+
+            self._invalidate_local(pattern=pattern)
+            return deleted
         except Exception as e:
             print(f"Cache clear error for pattern {pattern}: {e}")
             return 0
 
 
+class AsyncCacheManager(Generic[T]):
+    """
+    CacheManager's get, set and delete on the async client, for async code
+    that can't block the event loop
+    """
+
+    def __init__(self, ttl: int = 3600, value_type: Any = None):
+        self.redis = get_async_binary_redis_client()
+        self.local = get_local_cache()
+        self.codec = get_value_codec()
+        self.adapter = get_type_adapter(value_type) if value_type is not None else None
+        self.ttl = ttl
+
+    async def _get_raw(self, key: str) -> Any:
+        """Get a raw value from the local tier, or from redis"""
+        if self.local is None:
+            return await self.redis.get(key)
+
+        generation, value = self.local.get(key)
+        if value is MISSING:
+            value = await self.redis.get(key)
+            self.local.fill(key, value, generation)
+
+        return value
+
+    async def _invalidate_local(self, keys: list[str]):
+        if self.local is None:
+            return
+
+        message = self.local.invalidate(keys=keys)
+        if message is not None:
+            await self.redis.publish(CACHE_INVALIDATION_CHANNEL, message)
+
+    async def get(self, key: str) -> T | None:
+        """Get value from cache"""
+        try:
+            value = await self._get_raw(key)
+            if not value:
+                return None
+
+            value = self.codec.decode(value)
+            return self.adapter.validate_python(value) if self.adapter else value
+        except Exception as e:
+            print(f"Cache get error for key {key}: {e}")
+            return None
+
+    async def set(self, key: str, value: Any, ttl: int | None = None) -> bool:
+        """Set value in cache"""
+        try:
+            if self.adapter:
+                value = self.adapter.dump_python(value, mode="json")
+            await self.redis.setex(key, ttl or self.ttl, self.codec.encode(value))
+            await self._invalidate_local(keys=[key])
+            return True
+        except Exception as e:
+            print(f"Cache set error for key {key}: {e}")
+            return False
+
+    async def delete(self, key: str) -> bool:
+        """Delete value from cache"""
+        try:
+            await self.redis.delete(key)
+            await self._invalidate_local(keys=[key])
+            return True
+        except Exception as e:
+            print(f"Cache delete error for key {key}: {e}")
+            return False
+
+
+# Decides a ticket scan atomically.
+# KEYS: the tickets hash, the scans hash and the pending scans list
+# ARGV: the ticket code, the scan and the pending scan
+SCAN_SCRIPT = """
+local ticket = redis.call('HGET', KEYS[1], ARGV[1])
+if not ticket then
+    return {0, ''}
+end
+
+local scan = redis.call('HGET', KEYS[2], ARGV[1])
+if scan then
+    return {2, scan}
+end
+
+redis.call('HSET', KEYS[2], ARGV[1], ARGV[2])
+redis.call('RPUSH', KEYS[3], ARGV[3])
+return {1, ticket}
+"""
+
+
+class ScanStateCache:
+    """
+    Holds the tickets of active events in Redis so that scans can be decided
+    without touching the database.
+
+    Every event has a hash of its tickets, a hash of the tickets that have
+    been scanned and a list of the scans that haven't been written to the
+    database yet. Unlike CacheManager, errors are raised so that callers can
+    fall back to the database.
+    """
+
+    not_found = 0
+    scanned = 1
+    duplicate = 2
+
+    def __init__(self, ttl: int):
+        self.redis = get_redis_client()
+        self.ttl = ttl
+        self._scan = self.redis.register_script(SCAN_SCRIPT)
+        self._release = self.redis.register_script(RELEASE_LOCK_SCRIPT)
+
+    def _keys(self, event_id: int) -> tuple[str, str, str]:
+        prefix = f"events:{event_id}:scan-state"
+        return f"{prefix}:tickets", f"{prefix}:scans", f"{prefix}:pending"
+
+    def is_loaded(self, event_id: int) -> bool:
+        return bool(self.redis.exists(f"events:{event_id}:scan-state:loaded"))
+
+    def load(self, event_id: int, tickets: dict[str, str], scans: dict[str, str]):
+        """
+        Loads the tickets and scans of an event.
+
+        Scans that are already there are kept, they may not have been written
+        to the database yet.
+        """
+
+        tickets_key, scans_key, pending_key = self._keys(event_id)
+        loaded_key = f"events:{event_id}:scan-state:loaded"
+
+        pipe = self.redis.pipeline(transaction=False)
+        if tickets:
+            pipe.hset(tickets_key, mapping=tickets)
+        for code, scan in scans.items():
+            pipe.hsetnx(scans_key, code, scan)
+        for key in (tickets_key, scans_key, pending_key):
+            pipe.expire(key, self.ttl)
+        pipe.set(loaded_key, 1, ex=self.ttl)
+        pipe.execute()
+
+    def record(self, event_id: int, scans: dict[str, str]):
+        """
+        Keeps scans that were made in the database, so the tickets aren't
+        let in again
+        """
+
+        _, scans_key, _ = self._keys(event_id)
+        pipe = self.redis.pipeline(transaction=False)
+        for code, scan in scans.items():
+            pipe.hsetnx(scans_key, code, scan)
+        pipe.expire(scans_key, self.ttl)
+        pipe.execute()
+
+    def scan(self, event_id: int, scans: list[tuple[str, str, str]]) -> list[tuple[int, str]]:
+        """
+        Scans tickets, ``scans`` holds the code, scan and pending scan of
+        every ticket.
+
+        Returns the status of every scan along with the ticket if it was
+        scanned or the earlier scan if it was a duplicate.
+        """
+
+        keys = self._keys(event_id)
+        pipe = self.redis.pipeline(transaction=False)
+        for code, scan, pending in scans:
+            self._scan(keys=keys, args=[code, scan, pending], client=pipe)
+
+        return [(int(status), value) for status, value in pipe.execute()]
+
+    def pop_pending(self, event_id: int, count: int) -> list[str]:
+        _, _, pending_key = self._keys(event_id)
+        return self.redis.lpop(pending_key, count) or []
+
+    def requeue_pending(self, event_id: int, pending: list[str]):
+        _, _, pending_key = self._keys(event_id)
+        self.redis.lpush(pending_key, *reversed(pending))
+
+    def has_pending(self, event_id: int) -> bool:
+        _, _, pending_key = self._keys(event_id)
+        return self.redis.llen(pending_key) > 0
+
+    def lock_flush(self, event_id: int, timeout: int) -> str | None:
+        """Take the flush lock of an event, returns its token or None if it's taken"""
+        token = uuid.uuid4().hex
+        if self.redis.set(f"events:{event_id}:scan-state:flush", token, nx=True, ex=timeout):
+            return token
+        return None
+
+    def unlock_flush(self, event_id: int, token: str):
+        # The lock may have expired and been taken by another flush
+        self._release(keys=[f"events:{event_id}:scan-state:flush"], args=[token])
+
 
 def get_cache_manager() -> CacheManager[Any]:
     return CacheManager[Any]()
 
 
 CacheDep = Annotated[CacheManager[T], Depends(get_cache_manager)]
+
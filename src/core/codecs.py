@@ -0,0 +1,130 @@
+'''
+Encodes cached values as bytes.
+
+Every value starts with a header byte with the id of its codec, and
+COMPRESSED set when the rest is zstd compressed. That way values can be read
+whatever codec the reader is set to use. Values without a header are plain
+JSON written before codecs existed.
+
+orjson, msgpack and zstandard come with the ``cache`` extra.
+'''
+
+import json
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from src.core.config import settings
+
+# Set in the header of compressed values
+COMPRESSED = 0x80
+
+
+class Codec(ABC):
+    id: int
+    name: str
+    available = True
+
+    @abstractmethod
+    def dumps(self, value: Any) -> bytes:
+        '''Encodes a value, without the header'''
+
+    @abstractmethod
+    def loads(self, data: bytes) -> Any:
+        '''Decodes a value, without the header'''
+
+
+class JSONCodec(Codec):
+    id = 1
+    name = 'json'
+
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(value, default=str, separators=(',', ':')).encode()
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec(Codec):
+    id = 2
+    name = 'orjson'
+    available = orjson is not None
+
+    def dumps(self, value: Any) -> bytes:
+        return orjson.dumps(value, default=str)
+
+    def loads(self, data: bytes) -> Any:
+        return orjson.loads(data)
+
+
+class MsgpackCodec(Codec):
+    id = 3
+    name = 'msgpack'
+    available = msgpack is not None
+
+    def dumps(self, value: Any) -> bytes:
+        return msgpack.packb(value, default=str)
+
+    def loads(self, data: bytes) -> Any:
+        return msgpack.unpackb(data)
+
+
+CODECS: dict[int, Codec] = {codec.id: codec for codec in (JSONCodec(), OrjsonCodec(), MsgpackCodec())}
+
+
+class ValueCodec:
+    def __init__(self, codec_name: str, compression_threshold: int | None):
+        codec = next((codec for codec in CODECS.values() if codec.name == codec_name), None)
+        if codec is None:
+            raise ValueError(f"There's no cache codec named '{codec_name}'")
+        if not codec.available:
+            raise RuntimeError(f"The '{codec_name}' cache codec needs the cache extra installed")
+        if compression_threshold is not None and zstandard is None:
+            raise RuntimeError('Compressing cached values needs the cache extra installed')
+
+        self.codec = codec
+        self.compression_threshold = compression_threshold
+
+    def encode(self, value: Any) -> bytes:
+        data = self.codec.dumps(value)
+        header = self.codec.id
+        if self.compression_threshold is not None and len(data) > self.compression_threshold:
+            data = zstandard.compress(data)
+            header |= COMPRESSED
+
+        return bytes([header]) + data
+
+    def decode(self, data: bytes) -> Any:
+        codec = CODECS.get(data[0] & ~COMPRESSED)
+        if codec is None:
+            return json.loads(data)
+
+        body = data[1:]
+        if data[0] & COMPRESSED:
+            if zstandard is None:
+                raise RuntimeError('Decompressing cached values needs the cache extra installed')
+            body = zstandard.decompress(body)
+
+        if not codec.available:
+            raise RuntimeError(f"The '{codec.name}' cache codec needs the cache extra installed")
+        return codec.loads(body)
+
+
+@lru_cache
+def get_value_codec() -> ValueCodec:
+    return ValueCodec(settings.cache_codec, settings.cache_compression_threshold)
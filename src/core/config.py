@@ -1,5 +1,6 @@
 from functools import lru_cache
 from pathlib import Path
+from typing import Literal
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -35,6 +36,30 @@ class Settings(BaseSettings):
     jwt_algorithm: str = Field("HS256", description="Algorithm used to sign JWT tokens")
     jwt_access_expiry: int = Field(15, description="JWT Token expiry in minutes")
     jwt_refresh_expiry: int = Field(60 * 24, description="JWT Token expiry in minutes")
+    metrics_token: str | None = Field(
+        None, description="The bearer token /metrics is read with, it's off without one"
+    )
+
+    bcrypt_rounds: int = Field(
+        12, description="The bcrypt cost, passwords are rehashed on login when it changes"
+    )
+    password_hashing_workers: int = Field(
+        4, description="The number of threads that hash and verify passwords"
+    )
+    password_hashing_max_queue: int = Field(
+        64, description="The number of password hashes that can wait for a thread"
+    )
+    principal_cache_ttl: int = Field(
+        30, description="How long, in seconds, authenticated users are cached"
+    )
+    principal_cache_size: int = Field(
+        1024, description="The number of authenticated users cached per process"
+    )
+    principal_cache_redis: bool = Field(
+        False,
+        description="Whether authenticated users are also cached in redis and "
+        "dropped in every process when they change",
+    )
 
     # email
     mail_host: str = Field("localhost", description="The email server ip")
@@ -53,6 +78,69 @@ class Settings(BaseSettings):
     redis_host: str = Field("localhost", description="Redis server host")
     redis_port: int = Field(6379, description="Redis server port")
     redis_db: int = Field(0, description="Redis database number")
+    redis_max_connections: int = Field(
+        50, description="The number of connections each redis pool opens at most"
+    )
+    redis_socket_timeout: float = Field(
+        5, description="How long, in seconds, to wait on a redis command"
+    )
+    redis_connect_timeout: float = Field(
+        2, description="How long, in seconds, to wait to connect to redis"
+    )
+    redis_health_check_interval: int = Field(
+        30, description="How long, in seconds, a redis connection can be idle before it's checked"
+    )
+    cache_codec: Literal["json", "orjson", "msgpack"] = Field(
+        "json", description="How cached values are encoded, orjson and msgpack need the cache extra"
+    )
+    cache_compression_threshold: int | None = Field(
+        None,
+        description="The size, in bytes, above which cached values are zstd compressed, "
+        "needs the cache extra",
+    )
+    cache_local_enabled: bool = Field(
+        False, description="Whether hot cache entries are also kept in each process"
+    )
+    cache_local_ttl: int = Field(
+        10, description="How long, in seconds, a process keeps a cache entry at most"
+    )
+    cache_local_sizes: dict[str, int] = Field(
+        {"cache": 4096, "companies": 1024},
+        description="The number of entries a process keeps of each cache namespace, "
+        "the part of a key before the first colon",
+    )
+
+    # tickets
+    ticket_render_workers: int = Field(
+        2, description="The number of processes used to render ticket pdfs in bulk"
+    )
+    ticket_render_batch_size: int = Field(
+        50, description="The number of tickets each render process handles at a time"
+    )
+    ticket_qr_style: Literal["vector", "raster"] = Field(
+        "vector",
+        description="Whether ticket QR codes are drawn as vector shapes or images",
+    )
+    ticket_render_mode: Literal["eager", "lazy"] = Field(
+        "eager",
+        description="Whether ticket pdfs are rendered when the ticket is created "
+        "or the first time they are needed",
+    )
+
+    ticket_code_batch_size: int = Field(
+        100, description="The number of ticket codes reserved for an event at a time"
+    )
+
+    # scanning
+    scan_state_enabled: bool = Field(
+        False, description="Whether ticket scans are decided in redis"
+    )
+    scan_state_ttl: int = Field(
+        60 * 60 * 24, description="How long an event's tickets are kept in redis"
+    )
+    scan_flush_batch_size: int = Field(
+        500, description="The number of scans written to the database at a time"
+    )
 
     model_config = SettingsConfigDict(env_file=".env")
 
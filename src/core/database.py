@@ -1,12 +1,17 @@
 from datetime import datetime
+from functools import lru_cache
+from typing import AsyncGenerator, Generator
 
-from sqlalchemy import DateTime, Integer, create_engine
+from sqlalchemy import DateTime, Integer, create_engine, make_url
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import (AsyncEngine, AsyncSession,
+                                    async_sessionmaker, create_async_engine)
 from sqlalchemy.orm import (Mapped, Session, declarative_base, mapped_column,
                             sessionmaker)
 
 from src.common.exceptions import UniqueValidationError
 from src.core.config import settings
+from src.core.logger import logger
 
 engine = create_engine(settings.db_url, echo=False)
 
@@ -14,7 +19,11 @@ engine = create_engine(settings.db_url, echo=False)
 class DBSession(Session):
     def commit(self) -> None:
         try:
-            super().commit()
+            if self.info.get('unit_of_work'):
+                # The request commits once when it's done, see get_db
+                self.flush()
+            else:
+                super().commit()
         except IntegrityError as e:
             # TODO: Handle every error gracefully
             print(e)
@@ -26,6 +35,91 @@ SessionLocal = sessionmaker(class_=DBSession,
                             bind=engine)
 
 
+def get_db() -> Generator[DBSession, None, None]:
+    '''
+    A session shared by everything in a request.
+
+    Commits only flush until the request is done, then everything is
+    committed at once, or rolled back if the request failed.
+    '''
+
+    db = SessionLocal()
+    db.info['unit_of_work'] = True
+    try:
+        yield db
+        db.info['unit_of_work'] = False
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+# The async drivers of the databases async sessions can use
+ASYNC_DRIVERS = {
+    'postgresql': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+
+@lru_cache
+def get_async_engine() -> AsyncEngine:
+    '''
+    The engine of async sessions, it talks to the same database as ``engine``
+    through the async driver of its backend
+    '''
+
+    url = make_url(settings.db_url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"There's no async driver for {backend} databases, "
+                         f"DB_URL should be one of {', '.join(ASYNC_DRIVERS)}")
+
+    return create_async_engine(url.set(drivername=ASYNC_DRIVERS[backend]), echo=False)
+
+
+class AsyncDBSession(AsyncSession):
+    async def commit(self) -> None:
+        try:
+            if self.info.get('unit_of_work'):
+                # The request commits once when it's done, see get_async_db
+                await self.flush()
+            else:
+                await super().commit()
+        except IntegrityError as e:
+            logger.error("Could not commit: {}", e)
+            raise UniqueValidationError()
+
+
+@lru_cache
+def get_async_sessionmaker() -> async_sessionmaker[AsyncDBSession]:
+    # Expired attributes can't be lazy loaded in async code, so objects are
+    # kept as they are after a commit
+    return async_sessionmaker(get_async_engine(),
+                              class_=AsyncDBSession,
+                              autoflush=False,
+                              expire_on_commit=False)
+
+
+async def get_async_db() -> AsyncGenerator[AsyncDBSession, None]:
+    '''
+    The async version of get_db
+    '''
+
+    db = get_async_sessionmaker()()
+    db.info['unit_of_work'] = True
+    try:
+        yield db
+        db.info['unit_of_work'] = False
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    finally:
+        await db.close()
+
+
 class BaseModelMixin:
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
 
@@ -0,0 +1,143 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import fakeredis
+import pytest
+from pydantic import BaseModel
+
+from src.core import cache
+from src.core.cache import MISSING, AsyncCacheManager, CacheManager, LocalCache
+
+
+class Job(BaseModel):
+    status: str
+    rendered: int
+
+
+@pytest.fixture
+def redis_server(monkeypatch):
+    '''
+    Points every redis client at the same fake server
+    '''
+
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(cache, '_redis_client',
+                        fakeredis.FakeRedis(server=server, decode_responses=True))
+    monkeypatch.setattr(cache, '_binary_redis_client', fakeredis.FakeRedis(server=server))
+    monkeypatch.setattr(cache, '_async_binary_redis_client',
+                        fakeredis.FakeAsyncRedis(server=server))
+    return server
+
+
+def test_async_values_are_read_by_the_sync_cache(redis_server):
+    async def run():
+        async_cache = AsyncCacheManager[Job](value_type=Job)
+        await async_cache.set('jobs:1', Job(status='rendering', rendered=2))
+        assert await async_cache.get('jobs:1') == Job(status='rendering', rendered=2)
+
+        sync_cache = CacheManager[Job](value_type=Job)
+        assert sync_cache.get('jobs:1') == Job(status='rendering', rendered=2)
+
+        await async_cache.delete('jobs:1')
+        assert await async_cache.get('jobs:1') is None
+
+    asyncio.run(run())
+
+
+def test_concurrent_misses_are_computed_once(redis_server):
+    computed = []
+
+    def compute():
+        computed.append(1)
+        time.sleep(0.2)
+        return 'value'
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(
+            lambda _: CacheManager[str]().get_or_compute('reports:1', compute), range(8)
+        ))
+
+    assert results == ['value'] * 8
+    assert len(computed) == 1
+
+
+def test_expired_entries_are_served_while_another_process_refreshes(redis_server):
+    cache_manager = CacheManager[str]()
+    entry = {'value': 'stale', 'delta': 0, 'expires_at': time.time() - 1}
+    cache_manager._write('reports:1', entry, ttl=60)
+    # Held by the process refreshing it
+    assert cache_manager._lock('reports:1', timeout=10)
+
+    def compute():
+        raise AssertionError('Computed while another process was refreshing')
+
+    assert cache_manager.get_or_compute('reports:1', compute, stale_ttl=60) == 'stale'
+
+
+def test_waiting_stops_after_the_lock_timeout(redis_server):
+    stuck = threading.Event()
+    release = threading.Event()
+
+    def compute_stuck():
+        stuck.set()
+        release.wait(10)
+        return 'stuck'
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        pool.submit(CacheManager[str]().get_or_compute, 'reports:1', compute_stuck, lock_timeout=1)
+        stuck.wait(5)
+
+        started_at = time.monotonic()
+        value = CacheManager[str]().get_or_compute('reports:1', lambda: 'fresh', lock_timeout=1)
+        waited = time.monotonic() - started_at
+        release.set()
+
+    assert value == 'fresh'
+    assert 1 <= waited < 3
+
+
+def make_local_cache(ttl: int = 30) -> LocalCache:
+    local = LocalCache({'companies': 2}, ttl=ttl)
+    # As if it were subscribed to invalidations
+    local._listening.set()
+    return local
+
+
+def test_least_recently_used_local_entries_are_evicted():
+    local = make_local_cache()
+    for key in ('companies:1', 'companies:2'):
+        local.fill(key, b'company', local.get(key)[0])
+
+    local.get('companies:1')
+    local.fill('companies:3', b'company', local.get('companies:3')[0])
+
+    assert local.get('companies:1')[1] == b'company'
+    assert local.get('companies:2')[1] is MISSING
+    assert local.get('companies:3')[1] == b'company'
+
+
+def test_expired_local_entries_are_dropped():
+    local = make_local_cache(ttl=0)
+    local.fill('companies:1', b'company', local.get('companies:1')[0])
+
+    assert local.get('companies:1')[1] is MISSING
+
+
+def test_reads_that_raced_an_invalidation_are_not_kept():
+    local = make_local_cache()
+    generation, _ = local.get('companies:1')
+
+    local.evict(['companies:1'])
+    local.fill('companies:1', b'old company', generation)
+
+    assert local.get('companies:1')[1] is MISSING
+
+
+def test_nothing_is_served_while_invalidations_are_down():
+    local = make_local_cache()
+    local.fill('companies:1', b'company', local.get('companies:1')[0])
+    local._listening.clear()
+
+    assert local.get('companies:1')[1] is MISSING
@@ -0,0 +1,29 @@
+import json
+
+import pytest
+
+from src.core.codecs import CODECS, COMPRESSED, ValueCodec
+
+VALUE = {'id': 1, 'name': 'Curox', 'staff': [{'id': 2, 'role': 'scanner'}] * 50}
+
+
+@pytest.mark.parametrize('codec', [codec.name for codec in CODECS.values()])
+@pytest.mark.parametrize('compression_threshold', [None, 64])
+def test_values_round_trip(codec: str, compression_threshold: int | None):
+    if not next(c for c in CODECS.values() if c.name == codec).available:
+        pytest.skip(f'{codec} is not installed')
+    if compression_threshold is not None:
+        pytest.importorskip('zstandard')
+
+    value_codec = ValueCodec(codec, compression_threshold)
+    data = value_codec.encode(VALUE)
+
+    assert bool(data[0] & COMPRESSED) == (compression_threshold is not None)
+    assert value_codec.decode(data) == VALUE
+
+    # Whatever the reader is set to use
+    assert ValueCodec('json', None).decode(data) == VALUE
+
+
+def test_values_without_a_header_are_json():
+    assert ValueCodec('json', None).decode(json.dumps(VALUE).encode()) == VALUE
@@ -0,0 +1,31 @@
+from sqlalchemy import PrimaryKeyConstraint, Table, UniqueConstraint
+
+from src.models import Base
+
+
+def get_indexed_columns(table: Table) -> list[list[str]]:
+    '''
+    The columns of every index of a table, unique constraints and primary
+    keys are backed by one too
+    '''
+
+    indexed = [[column.name for column in index.columns] for index in table.indexes]
+    for constraint in table.constraints:
+        if isinstance(constraint, (PrimaryKeyConstraint, UniqueConstraint)):
+            indexed.append([column.name for column in constraint.columns])
+
+    return indexed
+
+
+def test_foreign_keys_are_indexed():
+    # Foreign keys are what lists and joins filter on, so each one has to
+    # lead an index or every filter on it scans the table
+    unindexed = []
+    for table in Base.metadata.sorted_tables:
+        indexed = get_indexed_columns(table)
+        for foreign_key in table.foreign_key_constraints:
+            columns = [column.name for column in foreign_key.columns]
+            if not any(index[:len(columns)] == columns for index in indexed):
+                unindexed.append(f'{table.name}.{", ".join(columns)}')
+
+    assert not unindexed, f'Foreign keys without an index: {unindexed}'
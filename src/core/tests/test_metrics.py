@@ -0,0 +1,18 @@
+from fastapi.testclient import TestClient
+
+from src.core.config import settings
+from src.main import app
+
+client = TestClient(app)
+
+
+def test_metrics_need_the_token(monkeypatch):
+    assert client.get('/metrics').status_code == 404
+
+    monkeypatch.setattr(settings, 'metrics_token', 'metrics-token')
+    assert client.get('/metrics').status_code == 403
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 403
+
+    response = client.get('/metrics', headers={'Authorization': 'Bearer metrics-token'})
+    assert response.status_code == 200
+    assert 'password_hashing' in response.json()
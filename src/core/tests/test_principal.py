@@ -0,0 +1,33 @@
+from datetime import datetime
+
+from src.core.auth.principal import PrincipalCache
+from src.features.auth.models import UserModel
+
+NOW = datetime(2026, 10, 16)
+
+
+def make_user() -> UserModel:
+    return UserModel(id=1, email='jane@ac.ac', first_name='Jane', is_active=True,
+                     created_at=NOW, updated_at=NOW)
+
+
+def test_users_are_cached_without_redis():
+    cache = PrincipalCache(ttl=30, size=8, use_redis=False)
+    generation, user = cache.get(1)
+    assert user is None
+
+    cache.set(make_user(), generation)
+    _, user = cache.get(1)
+
+    assert user is not None and user.email == 'jane@ac.ac'
+    assert cache._listener is None
+
+
+def test_users_read_before_an_invalidation_are_not_cached():
+    cache = PrincipalCache(ttl=30, size=8, use_redis=False)
+    generation, _ = cache.get(1)
+
+    cache.invalidate(1)
+    cache.set(make_user(), generation)
+
+    assert cache.get(1)[1] is None
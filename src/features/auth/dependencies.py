@@ -4,6 +4,7 @@ from fastapi import Depends
 
 from src.common.repo import get_repo
 
-from .repo import UserRepo
+from .repo import AsyncUserRepo, UserRepo
 
 UserRepoDep = Annotated[UserRepo, Depends(get_repo(UserRepo))]
+AsyncUserRepoDep = Annotated[AsyncUserRepo, Depends(get_repo(AsyncUserRepo))]
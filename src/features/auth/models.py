@@ -33,14 +33,11 @@ class UserModel(Base):
 
     @property
     def name(self):
-        f_name = self.first_name
-        l_name = self.last_name
-        if f_name and l_name:
-            name = f'{f_name} {l_name}'
-        elif l_name:
-            name = f'{l_name}'
-
-        return name
+        names = [name for name in (self.first_name, self.last_name) if name]
+        if not names:
+            return self.email
+
+        return ' '.join(names)
 
     def set_password(self, password: str) -> None:
         hashed_password = hash_password(password)
@@ -1,7 +1,8 @@
 from fastapi import UploadFile
 import pendulum
-from src.common.repo import RepoBase
+from src.common.repo import AsyncRepoBase, RepoBase
 from src.common.utils.token import generate_token
+from src.core.auth.principal import principal_cache
 from src.features.auth.schemas import UserCreate
 
 from .models import UserModel
@@ -32,6 +33,8 @@ class UserRepo(RepoBase[UserModel]):
             db.rollback()
             raise e
 
+        principal_cache.invalidate(user.id)
+
         url = storage_backend.get_url(path)
         return url
 
@@ -44,6 +47,14 @@ class UserRepo(RepoBase[UserModel]):
 
         db.add(user)
         db.commit()
+        principal_cache.invalidate(user.id)
+
+    def update_password_hash(self, user: UserModel, hashed_password: str):
+        db = self.db
+
+        user.password = hashed_password
+        db.add(user)
+        db.commit()
 
     def generate_reset_token(self, user: UserModel):
         db = self.db
@@ -56,3 +67,26 @@ class UserRepo(RepoBase[UserModel]):
         db.add(user)
         db.commit()
         return token
+
+
+class AsyncUserRepo(AsyncRepoBase[UserModel]):
+    model = UserModel
+
+    async def update_password_hash(self, user: UserModel, hashed_password: str):
+        db = self.db
+
+        user.password = hashed_password
+        db.add(user)
+        await db.commit()
+
+    async def generate_reset_token(self, user: UserModel):
+        db = self.db
+
+        token = generate_token()
+        now = pendulum.now(pendulum.UTC)
+        user.password_reset_token = token
+        user.password_reset_token_expiry = now.add(minutes=5)
+
+        db.add(user)
+        await db.commit()
+        return token
@@ -15,7 +15,7 @@ from fastapi import (
 
 from src.common.exceptions import BadRequestException, NotFoundException
 from src.common.utils.responses import CustomResponse, build_response
-from src.core.auth import TokenPair, create_token_pair
+from src.core.auth import TokenPair, create_token_pair, verify_password_async
 from src.core.logger import logger
 from src.features.auth.models import UserModel
 from src.features.auth.schemas import (
@@ -27,31 +27,47 @@ from src.features.auth.schemas import (
     UserSchema,
 )
 from src.features.auth.utils import notify_user_of_password_reset, send_token_to_user
-from src.features.companies.dependencies import StaffRepoDep
-from src.features.companies.models import StaffModel, StaffRole
+from src.features.companies.dependencies import AsyncCompaniesRepoDep, AsyncStaffRepoDep
+from src.features.companies.models import CompanyModel, StaffModel, StaffRole
 
-from ..dependencies import UserRepoDep
+from ..dependencies import AsyncUserRepoDep, UserRepoDep
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
 
 @router.post("/token/", name="login", response_model=CustomResponse[TokenPair])
 async def get_token(
-    data: Annotated[UserLogin, Body()], repo: UserRepoDep, staff_repo: StaffRepoDep
+    data: Annotated[UserLogin, Body()],
+    repo: AsyncUserRepoDep,
+    staff_repo: AsyncStaffRepoDep,
+    company_repo: AsyncCompaniesRepoDep,
 ):
-    user = repo.get_by_column(UserModel.email == data.email)
+    user = await repo.get_by_column(UserModel.email == data.email)
     if user is None:
         raise BadRequestException("Incorrect email or password")
 
-    if not user.check_password(data.password):
+    is_valid, new_hash = await verify_password_async(data.password, user.password)
+    if not is_valid:
         raise BadRequestException("Incorrect email or password")
 
+    # The password was hashed with older settings
+    if new_hash is not None:
+        await repo.update_password_hash(user, new_hash)
+
     role = StaffRole.admin
-    as_staff = staff_repo.get_by_column(StaffModel.user_id == user.id)
+    as_staff = await staff_repo.get_by_column(StaffModel.user_id == user.id)
     if as_staff:
         role = cast(StaffRole, as_staff.role)
+        token_pair = create_token_pair(
+            user.id, role, staff_id=as_staff.id, company_id=as_staff.company_id
+        )
+    else:
+        companies = await company_repo.get_all(CompanyModel.owner_id == user.id) or []
+        token_pair = create_token_pair(
+            user.id, role, company_ids=[company.id for company in companies]
+        )
 
-    return build_response(create_token_pair(user.id, role))
+    return build_response(token_pair)
 
 
 @router.post("/signup/", name="signup", response_model=CustomResponse[UserSchema])
@@ -71,13 +87,13 @@ def signup(user: UserCreate, repo: UserRepoDep):
     name="account-verification",
     response_model=CustomResponse[None],
 )
-async def verify_email(data: EmailVerifySchema, repo: UserRepoDep):
+async def verify_email(data: EmailVerifySchema, repo: AsyncUserRepoDep):
     email = data.email
-    user = repo.get_by_column(UserModel.email == email)
+    user = await repo.get_by_column(UserModel.email == email)
     if user is None:
         raise NotFoundException("An account with this email address does not exists.")
 
-    token = repo.generate_reset_token(user)
+    token = await repo.generate_reset_token(user)
     await send_token_to_user(token, email)
     return build_response(None)
 
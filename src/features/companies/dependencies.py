@@ -1,15 +1,101 @@
 from typing import Annotated, Any
 
-from fastapi import Depends
+from fastapi import Depends, Request
 
 from src.common.repo import get_repo
 
-from src.core.cache import CacheDep
+from src.core.cache import CacheManager
+from src.features.auth.models import UserModel
 
-from .repo.companies_repo import CompaniesRepo
-from .repo.staff_repo import StaffRepo 
+from .models import CompanyModel, StaffModel, StaffRole
+from .repo.companies_repo import AsyncCompaniesRepo, CompaniesRepo
+from .repo.staff_repo import AsyncStaffRepo, StaffRepo
+from .schemas import CompanyDetailsSchema
 
 CompaniesRepoDep = Annotated[CompaniesRepo, Depends(get_repo(CompaniesRepo))]
 StaffRepoDep = Annotated[StaffRepo, Depends(get_repo(StaffRepo))]
+AsyncCompaniesRepoDep = Annotated[AsyncCompaniesRepo, Depends(get_repo(AsyncCompaniesRepo))]
+AsyncStaffRepoDep = Annotated[AsyncStaffRepo, Depends(get_repo(AsyncStaffRepo))]
 
-CompaniesCacheDep = CacheDep[list[dict[str, Any]]]
+
+def get_companies_cache() -> CacheManager[list[CompanyDetailsSchema]]:
+    return CacheManager[list[CompanyDetailsSchema]](value_type=list[CompanyDetailsSchema])
+
+
+CompaniesCacheDep = Annotated[CacheManager[list[CompanyDetailsSchema]], Depends(get_companies_cache)]
+
+
+class AuthContext:
+    '''
+    Who the caller is as staff or as a company owner.
+
+    It's read from the access token claims, see ``create_token_pair``, and
+    from the database for tokens issued without them.
+    '''
+
+    def __init__(self,
+                 user: UserModel,
+                 staff_id: int | None,
+                 company_id: int | None,
+                 role: StaffRole | None,
+                 owned_company_ids: frozenset[int],
+                 companies_repo: CompaniesRepo):
+        self.user = user
+        self.staff_id = staff_id
+        self.company_id = company_id
+        self.role = role
+        self.owned_company_ids = owned_company_ids
+        self._companies_repo = companies_repo
+
+    @property
+    def is_staff(self) -> bool:
+        return self.staff_id is not None
+
+    def has_role(self, role: StaffRole) -> bool:
+        return self.is_staff and self.role == role
+
+    def owns(self, company_id: int) -> bool:
+        if company_id in self.owned_company_ids:
+            return True
+
+        # The company may have been created after the token was issued
+        return self._companies_repo.exists(CompanyModel.id == company_id,
+                                           CompanyModel.owner_id == self.user.id)
+
+    def is_member_of(self, company_id: int) -> bool:
+        '''
+        Whether the caller is staff of the company, or its owner if they are
+        not staff
+        '''
+
+        if self.is_staff:
+            return self.company_id == company_id
+
+        return self.owns(company_id)
+
+
+def get_auth_context(request: Request,
+                     staff_repo: StaffRepoDep,
+                     companies_repo: CompaniesRepoDep) -> AuthContext:
+    user: UserModel = request.user
+    claims: dict[str, Any] = getattr(request.state, 'jwt_claims', None) or {}
+
+    if 'staff_id' in claims:
+        role = StaffRole(claims['role']) if claims['staff_id'] is not None else None
+        return AuthContext(user,
+                           staff_id=claims['staff_id'],
+                           company_id=claims['company_id'],
+                           role=role,
+                           owned_company_ids=frozenset(claims['company_ids']),
+                           companies_repo=companies_repo)
+
+    staff = staff_repo.get_by_column(StaffModel.user_id == user.id)
+    return AuthContext(user,
+                       staff_id=staff.id if staff else None,
+                       company_id=staff.company_id if staff else None,
+                       role=staff.role if staff else None,
+                       owned_company_ids=frozenset(),
+                       companies_repo=companies_repo)
+
+
+AuthContextDep = Annotated[AuthContext, Depends(get_auth_context)]
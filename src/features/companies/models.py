@@ -1,7 +1,7 @@
 import enum
 from typing import cast
 
-from sqlalchemy import Column, Enum, ForeignKey, Integer, String
+from sqlalchemy import Column, Enum, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.core.database import Base
@@ -13,7 +13,7 @@ class CompanyModel(Base):
 
     name: Mapped[str] = mapped_column(String(length=30))
     logo_path: Mapped[str] = mapped_column()
-    owner_id: Mapped[int] = mapped_column(ForeignKey('users.id'))
+    owner_id: Mapped[int] = mapped_column(ForeignKey('users.id'), index=True)
 
     staff = relationship('StaffModel', back_populates='company')
     owner = relationship('UserModel', back_populates='companies')
@@ -36,6 +36,9 @@ class StaffModel(Base):
     user_id = Column(Integer, ForeignKey('users.id'), unique=True, nullable=False)
     company_id = Column(Integer, ForeignKey('companies.id'), nullable=False)
 
+    # Also orders the staff list, see RepoBase.get_page
+    __table_args__ = (Index('ix_staff_company_id_created_at', 'company_id', 'created_at', 'id'),)
+
     user = relationship('UserModel', back_populates='staff')
     company = relationship('CompanyModel', back_populates='staff')
     scanned_tickets = relationship('EventTicketModel', back_populates='scanned_by')
@@ -2,17 +2,26 @@ import random
 from typing import cast
 
 from fastapi import UploadFile
+from sqlalchemy.orm import joinedload, selectinload
 
-from src.common.repo import RepoBase
+from src.common.repo import AsyncRepoBase, RepoBase
 from src.core.storage.backend import storage_backend
 from src.features.auth.models import UserModel
 from src.features.companies.schemas import CompanyUpdateSchema
+from src.features.companies.utils import invalidate_company_logo
 
-from ..models import CompanyModel
+from ..models import CompanyModel, StaffModel
 
 
 class CompaniesRepo(RepoBase[CompanyModel]):
     model = CompanyModel
+    loading_profiles = {
+        # CompanyDetailsSchema
+        'details': lambda: (
+            joinedload(CompanyModel.owner),
+            selectinload(CompanyModel.staff).joinedload(StaffModel.user),
+        ),
+    }
 
     def _get_logo_path(self, company_id: int, filename: str) -> str:
         return f'/companies/{company_id}/images/logo_{random.randint(1024, 10024)}_{filename}'
@@ -71,5 +80,11 @@ class CompaniesRepo(RepoBase[CompanyModel]):
             db.rollback()
             raise e
 
+        invalidate_company_logo(company_id)
+
         url = storage_backend.get_url(path)
         return url
+
+
+class AsyncCompaniesRepo(AsyncRepoBase[CompanyModel]):
+    model = CompanyModel
@@ -1,5 +1,6 @@
+from sqlalchemy.orm import joinedload
 
-from src.common.repo import RepoBase
+from src.common.repo import AsyncRepoBase, RepoBase
 from src.features.auth.models import UserModel
 from src.features.auth.schemas import UserCreate
 from src.features.companies.models import CompanyModel, StaffModel
@@ -8,6 +9,10 @@ from src.features.companies.schemas import StaffCreate
 
 class StaffRepo(RepoBase[StaffModel]):
     model = StaffModel
+    loading_profiles = {
+        # StaffDetailsSchema
+        'details': lambda: (joinedload(StaffModel.user),),
+    }
 
     def create_one(self,
                    company: CompanyModel,
@@ -33,3 +38,6 @@ class StaffRepo(RepoBase[StaffModel]):
 
         return db_staff
 
+
+class AsyncStaffRepo(AsyncRepoBase[StaffModel]):
+    model = StaffModel
@@ -1,7 +1,17 @@
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from PIL import Image
+
+from src.core.cache import CacheManager
 from src.core.logger import logger
 from src.core.mail import send_email
+from src.core.storage.backend import storage_backend
 
-from src.core.config import settings
+from src.core.config import default_company_logo_path, settings
 
 
 async def notify_staff_of_add(company_name: str,
@@ -20,3 +30,100 @@ async def notify_staff_of_add(company_name: str,
                      },
                      to=[email],
                      template_name='staff-add.html')
+
+
+def get_owner_cache_tag(owner_id: int) -> str:
+    return f'companies:owner:{owner_id}'
+
+
+def get_company_cache_tag(company_id: int) -> str:
+    return f'companies:company:{company_id}'
+
+
+def invalidate_companies_cache(cache: CacheManager, owner_id: int, company_id: int | None = None):
+    '''
+    Drops the cached companies of an owner and, if it's given, everything
+    cached about a company, like its staff's view of it
+    '''
+
+    tags = [get_owner_cache_tag(owner_id)]
+    if company_id is not None:
+        tags.append(get_company_cache_tag(company_id))
+
+    cache.invalidate_tags(*tags)
+
+
+# The number of decoded company logos kept in memory
+LOGO_CACHE_SIZE = 64
+# Logos are only ever drawn about 250x90 points wide on tickets, anything
+# bigger than this is scaled down once when it's loaded
+LOGO_MAX_SIZE = (800, 400)
+
+
+@dataclass(frozen=True)
+class CompanyLogo:
+    image: Image.Image
+    width: int
+    height: int
+    digest: str
+
+
+_logos: OrderedDict[tuple[int, str | None], CompanyLogo] = OrderedDict()
+_logos_lock = threading.Lock()
+
+
+def load_company_logo(logo_bytes: bytes) -> CompanyLogo:
+    """
+    Decodes and scales down a logo, keeping its original size for layouts
+    """
+
+    image = Image.open(io.BytesIO(logo_bytes))
+    width, height = image.size
+    image.thumbnail(LOGO_MAX_SIZE)
+    image.load()
+
+    return CompanyLogo(
+        image=image,
+        width=width,
+        height=height,
+        digest=hashlib.md5(logo_bytes).hexdigest(),
+    )
+
+
+def get_company_logo(company_id: int, logo_path: str | None) -> CompanyLogo:
+    """
+    Gets the decoded logo of a company, falling back to the default logo
+    """
+
+    key = (company_id, logo_path)
+    with _logos_lock:
+        logo = _logos.get(key)
+        if logo is not None:
+            _logos.move_to_end(key)
+            return logo
+
+    logo_bytes: bytes | None = None
+    if logo_path is not None:
+        logo_bytes = storage_backend.get_file(logo_path)
+
+    if logo_bytes is None:
+        with open(default_company_logo_path, 'rb') as f:
+            logo_bytes = f.read()
+
+    logo = load_company_logo(logo_bytes)
+    with _logos_lock:
+        _logos[key] = logo
+        while len(_logos) > LOGO_CACHE_SIZE:
+            _logos.popitem(last=False)
+
+    return logo
+
+
+def invalidate_company_logo(company_id: int):
+    """
+    Removes the cached logos of a company
+    """
+
+    with _logos_lock:
+        for key in [key for key in _logos if key[0] == company_id]:
+            _logos.pop(key)
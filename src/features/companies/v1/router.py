@@ -1,4 +1,4 @@
-from typing import Annotated, Any, cast
+from typing import Annotated, Any
 
 from fastapi import (
     APIRouter,
@@ -17,6 +17,8 @@ from src.common.exceptions import (
     NotFoundException,
     UnauthorisedException,
 )
+from src.common.pagination import PageParamsDep
+from src.common.schemas import Page
 from src.common.utils.responses import CustomResponse, build_response
 from src.core.auth.bearer import JWTBearer
 from src.core.cache import CacheDep
@@ -35,8 +37,18 @@ from src.features.events.dependencies import EventsRepoDep
 from src.features.events.models import EventModel
 from src.features.events.schemas import EventSchema
 
-from ..dependencies import CompaniesCacheDep, CompaniesRepoDep, StaffRepoDep
-from ..utils import notify_staff_of_add
+from ..dependencies import (
+    AuthContextDep,
+    CompaniesCacheDep,
+    CompaniesRepoDep,
+    StaffRepoDep,
+)
+from ..utils import (
+    get_company_cache_tag,
+    get_owner_cache_tag,
+    invalidate_companies_cache,
+    notify_staff_of_add,
+)
 
 router = APIRouter(
     prefix="/companies", dependencies=[Depends(JWTBearer())], tags=["Companies"]
@@ -51,40 +63,33 @@ router = APIRouter(
 def list_companies(
     request: Request,
     repo: CompaniesRepoDep,
-    staff_repo: StaffRepoDep,
+    auth: AuthContextDep,
     cache: CompaniesCacheDep,
 ):
     user = request.user
 
-    # Create cache key based on user and staff status
-    as_staff = staff_repo.get_by_column(StaffModel.user_id == user.id)
-    cache_key = f"companies:user:{user.id}:staff:{as_staff.id if as_staff else 'none'}"
-
-    # Try to get from cache
-    cached_companies = cache.get(cache_key)
-    if cached_companies is not None:
-        companies = [
-            CompanyDetailsSchema.model_validate_json(company)
-            for company in cached_companies
-        ]
-        return build_response(companies)
-
-    # Fetch from database
-    if as_staff:
-        companies = repo.get_all(CompanyModel.id == as_staff.company_id)
+    # Staff see their company, and owners the companies they own
+    if auth.is_staff:
+        cache_key = cache.get_tagged_key(
+            f"companies:list:staff:{auth.staff_id}",
+            get_company_cache_tag(auth.company_id),
+        )
     else:
-        companies = repo.get_all(CompanyModel.owner_id == user.id)
-
-    # Cache the result
-    companies_to_cache = None
-    if companies:
-        companies_to_cache = [
-            CompanyDetailsSchema.model_validate(company).model_dump_json()
-            for company in companies
-        ]
-    
-    cache.set(cache_key, companies_to_cache)
+        cache_key = cache.get_tagged_key(
+            f"companies:list:user:{user.id}", get_owner_cache_tag(user.id)
+        )
+
+    def get_companies() -> list[CompanyDetailsSchema]:
+        if auth.is_staff:
+            companies = repo.get_all(CompanyModel.id == auth.company_id, profile="details")
+        else:
+            companies = repo.get_all(CompanyModel.owner_id == user.id, profile="details")
 
+        return [CompanyDetailsSchema.model_validate(company) for company in companies or []]
+
+    # The dashboard loads this on every visit, so only one request rebuilds
+    # it when it expires
+    companies = cache.get_or_compute(cache_key, get_companies, stale_ttl=60)
     return build_response(companies)
 
 
@@ -103,7 +108,7 @@ def create_company(
     user: UserModel = request.user
     company = repo.create_one(user, name, logo)
 
-    cache.clear_pattern(f"companies:user:{user.id}:*")
+    invalidate_companies_cache(cache, user.id)
     return build_response(company)
 
 
@@ -152,7 +157,7 @@ def update_company_details(
         raise UnauthorisedException()
 
     company = repo.update(company_data, company)
-    cache.clear_pattern(f"companies:user:{user.id}:*")
+    invalidate_companies_cache(cache, user.id, company.id)
     return build_response(company)
 
 
@@ -169,25 +174,30 @@ def update_avatar(
         raise UnauthorisedException()
 
     url = repo.update_logo(company, logo)
-    cache.clear_pattern(f"companies:user:{user.id}:*")
+    invalidate_companies_cache(cache, user.id, company.id)
     return build_response(url)
 
 
 @company_router.get(
     "/staff/",
     name="company-staff-list",
-    response_model=CustomResponse[list[StaffDetailsSchema]],
+    response_model=CustomResponse[Page[StaffDetailsSchema]],
 )
-def list_company_staff(request: Request, company: CompanyDep, staff_repo: StaffRepoDep):
-    user = request.user
-    user_staff = staff_repo.get_by_column(StaffModel.user_id == user.id)
-    if user_staff:
-        if cast(int, user_staff.company_id) != company.id:
+def list_company_staff(
+    company: CompanyDep,
+    staff_repo: StaffRepoDep,
+    auth: AuthContextDep,
+    page: PageParamsDep,
+):
+    if auth.is_staff:
+        if auth.company_id != company.id:
             raise UnauthorisedException()
-    elif company.owner_id != user.id:
+    elif company.owner_id != auth.user.id:
         raise UnauthorisedException()
 
-    staff = staff_repo.get_all(StaffModel.company_id == company.id)
+    staff = staff_repo.get_page(
+        StaffModel.company_id == company.id, page=page, profile="details"
+    )
     return build_response(staff)
 
 
@@ -204,6 +214,7 @@ def add_company_staff(
     staff_repo: StaffRepoDep,
     background_task: BackgroundTasks,
     user_repo: UserRepoDep,
+    cache: CompaniesCacheDep,
 ):
     user = request.user
     if company.owner_id != user.id:
@@ -220,6 +231,8 @@ def add_company_staff(
             raise BadRequestException("A user with that phone number already exists")
 
     staff = staff_repo.create_one(company, user_data, staff_data)
+    # The company details list its staff
+    invalidate_companies_cache(cache, user.id, company.id)
     background_task.add_task(
         notify_staff_of_add,
         email=staff.user.email,
@@ -234,35 +247,29 @@ def add_company_staff(
 @company_router.get(
     "/events/",
     name="company-events-list",
-    response_model=CustomResponse[list[EventSchema]],
+    response_model=CustomResponse[Page[EventSchema]],
 )
 def list_company_events(
-    request: Request,
     company: CompanyDep,
     events_repo: EventsRepoDep,
-    staff_repo: StaffRepoDep,
+    auth: AuthContextDep,
+    page: PageParamsDep,
 ):
     """
     Lists the events belonging to a company
     """
 
-    user: UserModel = request.user
-
     # Permissions
-    staff = staff_repo.get_by_column(StaffModel.user_id == user.id)
-    if staff:
+    if auth.is_staff:
         # check if this staff has access to this company
-        exists = staff_repo.exists(
-            StaffModel.user_id == user.id, StaffModel.company_id == company.id
-        )
-        if not exists:
+        if auth.company_id != company.id:
             raise UnauthorisedException()
     else:
         # Check if this is the owner (who is not a staff member)
-        if company.owner_id != user.id:
+        if company.owner_id != auth.user.id:
             raise UnauthorisedException()
 
-    events = events_repo.get_all(EventModel.company_id == company.id)
+    events = events_repo.get_page(EventModel.company_id == company.id, page=page)
     return build_response(events)
 
 
@@ -270,17 +277,14 @@ def list_company_events(
     "/summary/", name="company-summary", response_model=CustomResponse[CompanySummary]
 )
 def get_company_summary(
-    request: Request,
     company: CompanyDep,
     events_repo: EventsRepoDep,
-    staff_repo: StaffRepoDep,
+    auth: AuthContextDep,
 ):
-    user = request.user
-    as_staff = staff_repo.get_by_column(StaffModel.user_id == user.id)
-    if as_staff:
-        if as_staff.company_id != company.id:
+    if auth.is_staff:
+        if auth.company_id != company.id:
             raise UnauthorisedException()
-    elif company.owner_id != user.id:
+    elif company.owner_id != auth.user.id:
         raise UnauthorisedException()
 
     events_count = events_repo.count(EventModel.company_id == company.id)
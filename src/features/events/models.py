@@ -1,14 +1,17 @@
 import enum
+import secrets
 from datetime import datetime
 
 from sqlalchemy import (
     DateTime,
     Enum,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
     UniqueConstraint,
+    false,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -32,11 +35,26 @@ class EventModel(Base):
     status: Mapped[EventStatus] = mapped_column(
         Enum(EventStatus), default=EventStatus.active, nullable=True
     )
+    # The number of ticket codes reserved for this event, see
+    # ``src.features.events.utils.codes``
+    ticket_code_seq: Mapped[int] = mapped_column(default=0, server_default="0")
+    # The hex key of the event's shuffle of ticket codes, kept for as long as
+    # the event so its codes never move
+    ticket_code_key: Mapped[str] = mapped_column(
+        String(64), default=lambda: secrets.token_hex(32)
+    )
+    # Whether the event has tickets with random codes from before codes were
+    # reserved, which have to be checked for collisions
+    legacy_ticket_codes: Mapped[bool] = mapped_column(
+        default=False, server_default=false()
+    )
 
     company_id: Mapped[int] = mapped_column(Integer, ForeignKey("companies.id"))
     company = relationship("CompanyModel", uselist=False, back_populates="events")
 
-    created_by_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"))
+    created_by_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("users.id"), index=True
+    )
     created_by: Mapped[int] = relationship(
         "UserModel", uselist=False, back_populates="events_created"
     )
@@ -44,6 +62,12 @@ class EventModel(Base):
     tables = relationship("EventTableModel", back_populates="event")
     tickets = relationship("EventTicketModel", back_populates="event")
 
+    # The lists of an event or company are ordered by (created_at, id), see
+    # RepoBase.get_page, so their indexes end with it
+    __table_args__ = (
+        Index("ix_events_company_id_created_at", "company_id", "created_at", "id"),
+    )
+
 
 class EventTableModel(Base):
     __tablename__ = "event_tables"
@@ -51,7 +75,10 @@ class EventTableModel(Base):
     name: Mapped[str] = mapped_column(String(length=10))
     event_id: Mapped[int] = mapped_column(ForeignKey("events.id"))
 
-    __table_args__ = (UniqueConstraint("name", "event_id", name="uc_event_table"),)
+    __table_args__ = (
+        UniqueConstraint("name", "event_id", name="uc_event_table"),
+        Index("ix_event_tables_event_id_created_at", "event_id", "created_at", "id"),
+    )
 
     event = relationship("EventModel", back_populates="tables")
     tickets = relationship("EventTicketModel", back_populates="table")
@@ -61,11 +88,15 @@ class EventTicketModel(Base):
     __tablename__ = "event_tickets"
 
     code: Mapped[str] = mapped_column()
-    url: Mapped[str] = mapped_column()
+    url: Mapped[str | None] = mapped_column()
     price: Mapped[int] = mapped_column()
     event_id: Mapped[int] = mapped_column(ForeignKey("events.id"))
-    table_id: Mapped[int | None] = mapped_column(ForeignKey("event_tables.id"))
-    scanned_by_id: Mapped[int | None] = mapped_column(ForeignKey("staff.id"))
+    table_id: Mapped[int | None] = mapped_column(
+        ForeignKey("event_tables.id"), index=True
+    )
+    scanned_by_id: Mapped[int | None] = mapped_column(
+        ForeignKey("staff.id"), index=True
+    )
     scanned_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
     sent_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
 
@@ -95,9 +126,12 @@ class EventAttendeeModel(Base):
     phone_number: Mapped[str | None] = mapped_column(String(length=20))
     event_id: Mapped[int] = mapped_column(ForeignKey("events.id"))
     ticket_id: Mapped[int] = mapped_column(
-        ForeignKey("event_tickets.id"), nullable=True
+        ForeignKey("event_tickets.id"), nullable=True, index=True
     )
 
-    __table_args__ = (UniqueConstraint("event_id", "email", name="uc_event_attendee"),)
+    __table_args__ = (
+        UniqueConstraint("event_id", "email", name="uc_event_attendee"),
+        Index("ix_event_attendees_event_id_created_at", "event_id", "created_at", "id"),
+    )
 
     ticket = relationship("EventTicketModel", back_populates="attendee")
@@ -1,19 +1,24 @@
 from datetime import datetime
-import io
-from typing import cast
+from typing import NamedTuple, cast
 
 import pendulum
+from sqlalchemy import (DateTime, String, column, func, select, update,
+                        values)
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased, contains_eager, joinedload
 
 from src.common.exceptions import UniqueValidationError
 from src.common.repo import RepoBase
-from src.common.utils.token import generate_token
-from src.core.config import default_company_logo_path
-from src.core.storage.backend import storage_backend
+from src.core.config import settings
 from src.features.auth.models import UserModel
-from src.features.companies.models import CompanyModel
+from src.features.companies.models import CompanyModel, StaffModel
 from src.features.events.schemas import (EventAttendeeCreateSchema,
                                          EventCreateSchema)
-from src.features.events.utils.ticket import generate_ticket
+from src.features.companies.utils import get_company_logo
+from src.features.events.utils.codes import ticket_code_allocator
+from src.features.events.utils.ticket import (generate_ticket,
+                                              get_ticket_path,
+                                              get_ticket_template)
 
 from .models import (EventAttendeeModel, EventModel, EventTableModel,
                      EventTicketModel)
@@ -41,22 +46,198 @@ class EventsRepo(RepoBase[EventModel]):
 class EventTablesRepo(RepoBase[EventTableModel]):
     model = EventTableModel
 
+
+class TicketScan(NamedTuple):
+    scanned_at: datetime | None
+    name: str | None
+
+
 class TicketsRepo(RepoBase[EventTicketModel]):
     model = EventTicketModel
 
-    def scan_ticket(self, ticket: EventTicketModel, scanned_by_id: int):
+    def scan_ticket(self, event_id: int, code: str, scanned_by_id: int):
+        '''
+        Marks a ticket as scanned if it hasn't been yet.
+
+        The ticket is updated and its attendee and table are loaded in a single
+        statement, so two scanners can't both scan the same ticket. Returns
+        the attendee, or None if there is no unscanned ticket with this code.
+        '''
+
         db = self.db
 
-        ticket.scanned_by_id = scanned_by_id
-        ticket.scanned_at = datetime.now(pendulum.UTC)
-        db.add(ticket)
-        db.commit()
-        db.refresh(ticket)
+        scanned = (
+            update(EventTicketModel)
+            .where(EventTicketModel.code == code,
+                   EventTicketModel.event_id == event_id,
+                   EventTicketModel.scanned_by_id.is_(None))
+            .values(scanned_by_id=scanned_by_id,
+                    scanned_at=datetime.now(pendulum.UTC))
+            .returning(*EventTicketModel.__table__.c)
+            .cte('scanned')
+        )
+        ticket_alias = aliased(EventTicketModel, scanned)
+        table_alias = aliased(EventTableModel)
+        stmt = (
+            select(EventAttendeeModel)
+            .join(ticket_alias, EventAttendeeModel.ticket.of_type(ticket_alias))
+            .outerjoin(table_alias, ticket_alias.table.of_type(table_alias))
+            .options(
+                contains_eager(EventAttendeeModel.ticket.of_type(ticket_alias))
+                .contains_eager(ticket_alias.table.of_type(table_alias))
+            )
+            .execution_options(populate_existing=True)
+        )
+        try:
+            attendee = db.scalars(stmt).one_or_none()
+            if attendee is not None:
+                # Detach the attendee so committing doesn't expire what was
+                # just loaded
+                ticket = attendee.ticket
+                for instance in (attendee, ticket, ticket.table):
+                    if instance is not None:
+                        db.expunge(instance)
+
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            raise e
+
+        return attendee
+
+    def get_scan(self, event_id: int, code: str):
+        '''
+        Gets when and by whom a ticket was scanned, or None if the ticket
+        does not exist
+        '''
+
+        return self.get_scans(event_id, [code]).get(code)
+
+    def scan_many(self,
+                  event_id: int,
+                  scans: dict[str, datetime],
+                  scanned_by_id: int):
+        '''
+        Marks the tickets of many scans as scanned in a single statement.
+
+        ``scans`` maps ticket codes to when they were scanned. Returns the ids
+        of the tickets that were scanned keyed by their code. Tickets that
+        were already scanned are left as they are, see ``get_scans``.
+        '''
+
+        if not scans:
+            return {}
+
+        db = self.db
+
+        scanned = (
+            values(column('code', String),
+                   column('scanned_at', DateTime(timezone=True)),
+                   name='scans')
+            .data(list(scans.items()))
+        )
+        stmt = (
+            update(EventTicketModel)
+            .where(EventTicketModel.code == scanned.c.code,
+                   EventTicketModel.event_id == event_id,
+                   EventTicketModel.scanned_by_id.is_(None))
+            .values(scanned_by_id=scanned_by_id,
+                    scanned_at=scanned.c.scanned_at)
+            .returning(EventTicketModel.code, EventTicketModel.id)
+            .execution_options(synchronize_session=False)
+        )
+        try:
+            ticket_ids: dict[str, int] = {
+                code: ticket_id for code, ticket_id in db.execute(stmt)
+            }
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            raise e
+
+        return ticket_ids
+
+    def get_scans(self, event_id: int, codes: list[str]):
+        '''
+        Gets when and by whom the tickets with these codes were scanned,
+        keyed by code. Codes of tickets that don't exist are left out.
+        '''
+
+        stmt = (
+            select(EventTicketModel.code, EventTicketModel.scanned_at, UserModel)
+            .outerjoin(StaffModel, EventTicketModel.scanned_by_id == StaffModel.id)
+            .outerjoin(UserModel, StaffModel.user_id == UserModel.id)
+            .filter(EventTicketModel.code.in_(codes),
+                    EventTicketModel.event_id == event_id)
+        )
+        return {
+            code: TicketScan(scanned_at, user.name if user is not None else None)
+            for code, scanned_at, user in self.db.execute(stmt)
+        }
+
+    def get_checkins(self, ticket_ids: list[int]):
+        '''
+        Gets the code, attendee name, table name, scan time and scanner of
+        the tickets with these ids
+        '''
+
+        stmt = (
+            select(EventTicketModel.code,
+                   EventAttendeeModel.name,
+                   EventTableModel.name.label('table'),
+                   EventTicketModel.scanned_at,
+                   UserModel)
+            .join(EventAttendeeModel, EventAttendeeModel.ticket_id == EventTicketModel.id)
+            .outerjoin(EventTableModel, EventTicketModel.table_id == EventTableModel.id)
+            .outerjoin(StaffModel, EventTicketModel.scanned_by_id == StaffModel.id)
+            .outerjoin(UserModel, StaffModel.user_id == UserModel.id)
+            .filter(EventTicketModel.id.in_(ticket_ids))
+        )
+        return self.db.execute(stmt).all()
+
+    def get_checkin_counts(self, event_id: int):
+        '''
+        Gets the number of tickets and scanned tickets of every table of an
+        event
+        '''
+
+        stmt = (
+            select(EventTableModel.name.label('table'),
+                   func.count(EventTicketModel.id).label('total'),
+                   func.count(EventTicketModel.scanned_at).label('scanned'))
+            .outerjoin(EventTableModel, EventTicketModel.table_id == EventTableModel.id)
+            .filter(EventTicketModel.event_id == event_id)
+            .group_by(EventTableModel.name)
+            .order_by(EventTableModel.name)
+        )
+        return self.db.execute(stmt).all()
+
+    def get_manifest(self, event_id: int):
+        '''
+        Gets the code, attendee name, table name and scan time of every
+        ticket of an event
+        '''
+
+        stmt = (
+            select(EventTicketModel.code,
+                   EventAttendeeModel.name,
+                   EventTableModel.name.label('table'),
+                   EventTicketModel.scanned_at)
+            .join(EventAttendeeModel, EventAttendeeModel.ticket_id == EventTicketModel.id)
+            .outerjoin(EventTableModel, EventTicketModel.table_id == EventTableModel.id)
+            .filter(EventTicketModel.event_id == event_id)
+        )
+        return self.db.execute(stmt).all()
 
-        return ticket
 
 class AttendeesRepo(RepoBase[EventAttendeeModel]):
     model = EventAttendeeModel
+    loading_profiles = {
+        # EventAttendeeSchema
+        'details': lambda: (
+            joinedload(EventAttendeeModel.ticket).joinedload(EventTicketModel.table),
+        ),
+    }
 
     def create_one(self,
                    attendee_data: EventAttendeeCreateSchema,
@@ -65,48 +246,28 @@ class AttendeesRepo(RepoBase[EventAttendeeModel]):
                    table_name: str | None):
         db = self.db
 
-        max_trials = 10
-        trial = 0
-        code: str | None = None
-        while trial < max_trials:
-            trial += 1
-
-            generated_code = generate_token()
-            q = db.query(EventTicketModel).filter(EventTicketModel.code == generated_code)
-            if db.query(q.exists()).scalar():
-                continue
-
-            code = generated_code
-
-        if code is None:
-            return None
+        code = ticket_code_allocator.allocate(db, event.id, 1)[0]
 
         attendee_dict = attendee_data.model_dump()
         table_id: int | None = attendee_dict.get('table_id')
         if table_id is not None:
             attendee_dict.pop('table_id')
 
-        logo_path = company.logo_path
-        logo_bytes: bytes | None = None
-        if logo_path is not None:
-            logo_bytes = storage_backend.get_file(logo_path)
-
-        if logo_bytes is None:
-            with open(default_company_logo_path, 'rb') as f:
-                logo_bytes = f.read()
-
-        logo = io.BytesIO(logo_bytes)
-        attendee_dict['table'] = table_name
-        url = generate_ticket(code,
-                              logo=logo,
-                              event_name=event.name,
-                              event_venue=event.venue,
-                              event_date=event.date_from,
-                              attendees_data=[attendee_dict],
-                              company_id=company.id,
-                              event_id=event.id)
-
-        attendee_dict.pop('table')
+        # In lazy mode the pdf is rendered the first time it's needed,
+        # see ``get_ticket_pdf``
+        url: str | None = None
+        if settings.ticket_render_mode == 'eager':
+            template = get_ticket_template(event.id,
+                                           get_company_logo(company.id, company.logo_path),
+                                           event_name=event.name,
+                                           event_venue=event.venue,
+                                           event_date=event.date_from)
+            url = generate_ticket(code,
+                                  template=template,
+                                  attendees_data=[{**attendee_dict, 'table': table_name}],
+                                  company_id=company.id,
+                                  event_id=event.id)
+
         price = attendee_dict.pop('price')
         try:
             ticket = EventTicketModel(code=code,
@@ -131,3 +292,85 @@ class AttendeesRepo(RepoBase[EventAttendeeModel]):
 
         return attendee
 
+    def create_many(self,
+                    rows: list[tuple[int, EventAttendeeCreateSchema]],
+                    event: EventModel,
+                    tables: dict[int, str]):
+        '''
+        Creates the attendees and tickets of an import in a single transaction.
+
+        The ticket pdfs are not generated here, see ``render_imported_tickets``
+        and ``get_ticket_pdf``.
+        Returns the attendee id, ticket id and ticket code of every created
+        attendee and the errors of the rows that were skipped, both keyed by row.
+        '''
+
+        db = self.db
+
+        errors: dict[int, str] = {}
+        emails = [attendee_data.email for _, attendee_data in rows]
+        existing_emails = set(
+            db.scalars(
+                select(EventAttendeeModel.email).filter(
+                    EventAttendeeModel.event_id == event.id,
+                    EventAttendeeModel.email.in_(emails),
+                )
+            )
+        )
+
+        valid_rows: list[tuple[int, EventAttendeeCreateSchema]] = []
+        for row, attendee_data in rows:
+            if attendee_data.email in existing_emails:
+                errors[row] = 'This attendee already exists'
+                continue
+
+            table_id = attendee_data.table_id
+            if table_id is not None and table_id not in tables:
+                errors[row] = 'This table does not exist'
+                continue
+
+            existing_emails.add(attendee_data.email)
+            valid_rows.append((row, attendee_data))
+
+        codes = ticket_code_allocator.allocate(db, event.id, len(valid_rows))
+        attendees: dict[int, EventAttendeeModel] = {}
+        created: dict[int, tuple[int, int, str]] = {}
+        try:
+            for (row, attendee_data), code in zip(valid_rows, codes):
+                attendee_dict = attendee_data.model_dump()
+                table_id = attendee_dict.pop('table_id')
+                price = attendee_dict.pop('price')
+
+                url: str | None = None
+                if settings.ticket_render_mode == 'eager':
+                    url = get_ticket_path(event.company_id, event.id, code)
+
+                ticket = EventTicketModel(code=code,
+                                          url=url,
+                                          price=price,
+                                          event_id=event.id,
+                                          table_id=table_id)
+                attendee = EventAttendeeModel(**attendee_dict,
+                                              event_id=event.id,
+                                              ticket=ticket)
+                db.add(attendee)
+                attendees[row] = attendee
+
+            # Read the ids before committing, otherwise every attendee gets
+            # reloaded once it's expired
+            db.flush()
+            for row, attendee in attendees.items():
+                ticket = attendee.ticket
+                created[row] = (attendee.id, ticket.id, ticket.code)
+
+            db.commit()
+        except (IntegrityError, UniqueValidationError):
+            # Another request added some of them since they were checked
+            db.rollback()
+            raise UniqueValidationError(detail='Some of these attendees already exist')
+        except Exception as e:
+            db.rollback()
+            raise e
+
+        return created, errors
+
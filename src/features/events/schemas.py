@@ -58,7 +58,8 @@ class EventTicketSchema(BaseModelSchema):
                                         description='When this ticket was sent to the attendee')
     scanned_at: datetime | None = Field(default=None,
                                         description='When this ticket was scanned')
-    table: EventTableSchema     = Field(description='The table this ticket belongs to')
+    table: EventTableSchema | None = Field(default=None,
+                                           description='The table this ticket belongs to')
 
 
 class EventAttendeeBase(BaseModel):
@@ -83,3 +84,133 @@ class EventAttendeeCreateSchema(EventAttendeeBase):
     table_id: int | None    = Field(default=None,
                                     description='The table id that this attendee is assigned',
                                     examples=[1])
+
+class EventAttendeeImportRowSchema(BaseModel):
+    '''
+    The result of importing a single attendee row
+    '''
+    row: int                    = Field(description='The position of the row in the import',
+                                        examples=[1])
+    email: str | None           = Field(default=None,
+                                        description='The attendees email address',
+                                        examples=['attendee@ac.ac'])
+    created: bool               = Field(description='Whether the attendee was created')
+    attendee_id: int | None     = Field(default=None,
+                                        description='The id of the created attendee')
+    code: str | None            = Field(default=None,
+                                        description='The ticket code of the created attendee',
+                                        examples=['45CXY8'])
+    error: str | None           = Field(default=None,
+                                        description='Why the row was not imported')
+
+class EventAttendeeImportSchema(BaseModel):
+    '''
+    Serializes the result of a bulk attendee import
+    '''
+    job_id: str                                 = Field(description='The id of the ticket rendering job')
+    created: int                                = Field(description='The number of attendees created')
+    failed: int                                 = Field(description='The number of rows that were not imported')
+    rows: list[EventAttendeeImportRowSchema]    = Field(description='The result of every row')
+
+class EventAttendeeImportJobSchema(BaseModel):
+    '''
+    Serializes the ticket rendering progress of a bulk attendee import
+    '''
+    job_id: str     = Field(description='The id of the ticket rendering job')
+    status: str     = Field(description='The status of the job',
+                            examples=['rendering'])
+    total: int      = Field(description='The number of tickets to render')
+    rendered: int   = Field(description='The number of tickets rendered')
+    failed: int     = Field(description='The number of tickets that could not be rendered')
+
+class EventTicketManifestEntrySchema(BaseModel):
+    '''
+    Serializes a ticket in an offline scanning manifest
+    '''
+    hash: str               = Field(description='The hashed ticket code, see EventTicketManifestKeySchema.key')
+    name: str               = Field(description='The attendees name',
+                                    examples=['Jane Doe'])
+    table: str | None       = Field(default=None,
+                                    description='The table of the ticket',
+                                    examples=['Table 1'])
+    scanned: bool           = Field(description='Whether the ticket was scanned when the manifest was made')
+
+class EventTicketManifestSchema(BaseModel):
+    '''
+    Serializes the tickets of an event for scanning offline
+    '''
+    event_id: int                                   = Field(description='The id of the event')
+    device_id: str                                  = Field(description='The device the tickets were hashed for')
+    version: str                                    = Field(description='Changes whenever a ticket is added or scanned')
+    generated_at: datetime                          = Field(description='When the manifest was made')
+    tickets: list[EventTicketManifestEntrySchema]   = Field(description='The tickets of the event, sorted by hash')
+
+class EventTicketManifestKeySchema(BaseModel):
+    '''
+    Serializes the key a device hashes ticket codes with
+    '''
+    event_id: int   = Field(description='The id of the event')
+    device_id: str  = Field(description='The device the key is for')
+    key: str        = Field(description='A ticket code hashes to hmac-sha256(key, code) as hex, '
+                                        'truncated to the length of the manifest hashes')
+
+class EventTicketScanSchema(BaseModel):
+    '''
+    Used to upload a ticket scan made earlier
+    '''
+    code: str               = Field(description='The ticket code',
+                                    examples=['45CXY8'])
+    scanned_at: datetime    = Field(description='When the ticket was scanned')
+
+class EventTicketScansSchema(BaseModel):
+    '''
+    Used to upload many ticket scans at once
+    '''
+    scans: list[EventTicketScanSchema] = Field(description='The scans')
+
+class EventTicketScanResultSchema(BaseModel):
+    '''
+    Serializes the result of uploading a ticket scan
+    '''
+    code: str                       = Field(description='The ticket code',
+                                            examples=['45CXY8'])
+    status: str                     = Field(description='One of scanned, duplicate or not_found',
+                                            examples=['scanned'])
+    scanned_at: datetime | None     = Field(default=None,
+                                            description='When the ticket was scanned')
+    scanned_by: str | None          = Field(default=None,
+                                            description='Who scanned the ticket')
+
+class EventCheckinSchema(BaseModel):
+    '''
+    Serializes a ticket scan for the live check-in stream
+    '''
+    code: str                       = Field(description='The ticket code',
+                                            examples=['45CXY8'])
+    name: str                       = Field(description='The attendees name',
+                                            examples=['Jane Doe'])
+    table: str | None               = Field(default=None,
+                                            description='The table of the ticket',
+                                            examples=['Table 1'])
+    scanned_at: datetime | None     = Field(default=None,
+                                            description='When the ticket was scanned')
+    scanned_by: str | None          = Field(default=None,
+                                            description='Who scanned the ticket')
+
+class EventCheckinTableCountSchema(BaseModel):
+    '''
+    Serializes the check-in counters of a table
+    '''
+    table: str | None   = Field(default=None,
+                                description='The table, null for tickets without one',
+                                examples=['Table 1'])
+    total: int          = Field(description='The number of tickets')
+    scanned: int        = Field(description='The number of scanned tickets')
+
+class EventCheckinCountSchema(BaseModel):
+    '''
+    Serializes the check-in counters of an event
+    '''
+    total: int                                  = Field(description='The number of tickets')
+    scanned: int                                = Field(description='The number of scanned tickets')
+    tables: list[EventCheckinTableCountSchema]  = Field(description='The counters of every table')
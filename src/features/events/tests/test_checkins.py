@@ -0,0 +1,51 @@
+import asyncio
+
+import fakeredis
+
+from src.core import cache
+from src.features.events.schemas import (EventCheckinCountSchema,
+                                         EventCheckinSchema,
+                                         EventCheckinTableCountSchema)
+from src.features.events.utils import checkins
+
+
+def make_counts(scanned: int) -> EventCheckinCountSchema:
+    return EventCheckinCountSchema(
+        total=3,
+        scanned=scanned,
+        tables=[EventCheckinTableCountSchema(table='Table 1', total=3, scanned=scanned)],
+    )
+
+
+def publish_checkin(code: str):
+    checkin = EventCheckinSchema(code=code, name='Jane Doe', table='Table 1')
+    cache.get_redis_client().publish(checkins.get_checkins_channel(1), checkin.model_dump_json())
+
+
+def test_scans_in_the_first_count_are_not_added_again(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(cache, '_redis_client',
+                        fakeredis.FakeRedis(server=server, decode_responses=True))
+    monkeypatch.setattr(cache, '_async_binary_redis_client',
+                        fakeredis.FakeAsyncRedis(server=server))
+
+    def get_checkin_counts(event_id: int) -> EventCheckinCountSchema:
+        # Scanned while the stream was counting
+        publish_checkin('45CXY8')
+        return make_counts(scanned=1)
+
+    monkeypatch.setattr(checkins, 'get_checkin_counts', get_checkin_counts)
+
+    async def run() -> list[str]:
+        stream = checkins.stream_checkins(1)
+        events = [await anext(stream)]
+        publish_checkin('45CXY9')
+        events += [await anext(stream), await anext(stream)]
+        await stream.aclose()
+        return events
+
+    counts, checkin, next_counts = asyncio.run(run())
+
+    assert '"scanned":1' in counts
+    assert '45CXY9' in checkin
+    assert '"scanned":2' in next_counts
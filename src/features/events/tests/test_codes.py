@@ -0,0 +1,30 @@
+import re
+
+from src.common.utils.token import TOKEN_SPACE, TokenPermutation, encode_token
+from src.features.events.utils.codes import (MANIFEST_HASH_LENGTH,
+                                             get_manifest_key,
+                                             hash_ticket_code)
+
+
+def test_encode_token():
+    assert encode_token(0) == 'AA00AA'
+    assert encode_token(TOKEN_SPACE - 1) == '999999'
+
+
+def test_permuted_codes_are_unique():
+    permutation = TokenPermutation(b'event-tickets:1')
+    codes = [permutation.token(i) for i in range(20000)]
+
+    assert len(set(codes)) == len(codes)
+    assert all(re.fullmatch(r'[A-Z0-9]{2}[0-9]{2}[A-Z0-9]{2}', code) for code in codes)
+    assert codes != [TokenPermutation(b'event-tickets:2').token(i) for i in range(20000)]
+
+
+def test_manifest_hashes():
+    key = get_manifest_key(1, 1, 'gate-1')
+
+    assert key != get_manifest_key(2, 1, 'gate-1')
+    assert key != get_manifest_key(1, 1, 'gate-2')
+    assert len(hash_ticket_code(key, '45CXY8')) == MANIFEST_HASH_LENGTH
+    assert hash_ticket_code(key, '45CXY8') != hash_ticket_code(key, '45CXY9')
+    assert hash_ticket_code(key, '45CXY8') != hash_ticket_code(get_manifest_key(1, 1, 'gate-2'), '45CXY8')
@@ -0,0 +1,49 @@
+import io
+from datetime import datetime
+
+import pytest
+from PIL import Image
+from reportlab.lib.utils import ImageReader
+
+from src.features.events.utils.pdf import TicketTemplate
+
+table_records = [{'name': 'Jane Doe', 'table': 'Table 1', 'price': 2000}]
+
+
+def get_template():
+    logo = ImageReader(Image.new('RGB', (300, 100), color='white'))
+    return TicketTemplate(logo,
+                          event_name='My Event',
+                          event_venue='The Plaza',
+                          event_date=datetime(2024, 7, 15, 18, 30))
+
+
+def test_stamp_ticket():
+    template = get_template()
+    for qr_style in ('raster', 'vector'):
+        pdf_file = io.BytesIO()
+        template.stamp(pdf_file, '45CXY8', table_records, qr_style=qr_style)
+
+        assert pdf_file.getvalue().startswith(b'%PDF')
+
+
+def test_vector_qrcode_is_smaller():
+    template = get_template()
+    raster_file = io.BytesIO()
+    vector_file = io.BytesIO()
+    template.stamp(raster_file, '45CXY8', table_records, qr_style='raster')
+    template.stamp(vector_file, '45CXY8', table_records, qr_style='vector')
+
+    assert len(vector_file.getvalue()) < len(raster_file.getvalue())
+
+
+def test_vector_qrcode_decodes():
+    pdfium = pytest.importorskip('pypdfium2')
+    zxingcpp = pytest.importorskip('zxingcpp')
+
+    pdf_file = io.BytesIO()
+    get_template().stamp(pdf_file, '45CXY8', table_records, qr_style='vector')
+    page = pdfium.PdfDocument(pdf_file.getvalue())[0]
+    image = page.render(scale=300 / 72).to_pil()
+
+    assert [result.text for result in zxingcpp.read_barcodes(image)] == ['45CXY8']
@@ -0,0 +1,66 @@
+import json
+from datetime import datetime
+
+import pendulum
+import redis
+from pydantic import ValidationError
+
+from src.features.events.models import EventAttendeeModel, EventTicketModel
+from src.features.events.utils import scans
+
+NOW = datetime(2026, 10, 16, tzinfo=pendulum.UTC)
+
+
+def make_attendee(table=None) -> EventAttendeeModel:
+    ticket = EventTicketModel(id=1, code='45CXY8', price=2000, event_id=1,
+                              table=table, created_at=NOW, updated_at=NOW)
+    return EventAttendeeModel(id=1, name='Jane Doe', email='attendee@ac.ac',
+                              ticket=ticket, created_at=NOW, updated_at=NOW)
+
+
+def test_attendees_without_a_table_are_cached():
+    data = json.loads(scans.dump_attendee(make_attendee()))
+
+    assert data['ticket']['code'] == '45CXY8'
+    assert data['ticket']['table'] is None
+
+
+class UnloadedScanState:
+    def is_loaded(self, event_id: int) -> bool:
+        return False
+
+
+def test_scans_fall_back_to_the_database_when_loading_fails(monkeypatch):
+    def load_scan_state(db, event_id):
+        raise ValidationError.from_exception_data('EventAttendeeSchema', [])
+
+    monkeypatch.setattr(scans, 'get_scan_state', UnloadedScanState)
+    monkeypatch.setattr(scans, 'load_scan_state', load_scan_state)
+
+    assert scans.scan_tickets_in_cache(None, 1, {'45CXY8': NOW}, 1, 'Scanner') is None
+
+
+class DownScanState:
+    def record(self, event_id: int, scans: dict[str, str]):
+        raise redis.ConnectionError()
+
+
+class LoadedScanState:
+    def is_loaded(self, event_id: int) -> bool:
+        return True
+
+    def scan(self, event_id: int, items: list[tuple[str, str, str]]) -> list[tuple[int, str]]:
+        return []
+
+
+def test_events_scanned_while_redis_is_down_are_reloaded(monkeypatch):
+    loaded = []
+    monkeypatch.setattr(scans, 'get_scan_state', DownScanState)
+    scans.record_ticket_scans(1, {'45CXY8': NOW}, 1, 'Scanner')
+
+    monkeypatch.setattr(scans, 'get_scan_state', LoadedScanState)
+    monkeypatch.setattr(scans, 'load_scan_state', lambda db, event_id: loaded.append(event_id))
+    scans.scan_tickets_in_cache(None, 1, {}, 1, 'Scanner')
+    scans.scan_tickets_in_cache(None, 1, {}, 1, 'Scanner')
+
+    assert loaded == [1]
@@ -0,0 +1,159 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Any
+
+import pendulum
+import pytest
+from fastapi import BackgroundTasks
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+
+from src.common.utils.other import reverse
+from src.core.cache import get_cache_manager
+from src.core.config import settings
+from src.core.database import DBSession, get_db
+from src.features.auth.models import UserModel
+from src.features.companies.dependencies import AuthContext, get_auth_context
+from src.features.companies.models import CompanyModel
+from src.features.companies.repo import CompaniesRepo
+from src.features.events.models import EventModel, EventTableModel
+from src.features.events.repo import TicketScan
+from src.features.events.schemas import EventTicketScanSchema
+from src.features.events.v1 import router
+from src.features.events.v1.router import scan_tickets
+from src.main import app
+from src.models import Base
+
+NOW = datetime(2026, 10, 16, 20, tzinfo=pendulum.UTC)
+
+
+class ScannedTicketsRepo:
+    '''
+    Has ticket 45CXY8 scanned at the gate at NOW
+    '''
+
+    def scan_many(self, event_id: int, scans: dict[str, datetime], scanned_by_id: int):
+        return {}
+
+    def get_scans(self, event_id: int, codes: list[str]):
+        return {'45CXY8': TicketScan(NOW, 'Gate Staff')}
+
+
+def test_the_first_scan_to_reach_the_server_is_kept(monkeypatch):
+    monkeypatch.setattr(settings, 'scan_state_enabled', False)
+    auth = SimpleNamespace(staff_id=2, user=UserModel(email='scanner@ac.ac', first_name='Jane'))
+
+    # Scanned offline before the gate scanned it, but uploaded after
+    scans = [EventTicketScanSchema(code='45CXY8', scanned_at=NOW - timedelta(minutes=5))]
+    [result] = scan_tickets(scans, SimpleNamespace(id=1, name='Gala'), auth,
+                            ScannedTicketsRepo(), BackgroundTasks())
+
+    assert result.status == 'duplicate'
+    assert result.scanned_at == NOW
+    assert result.scanned_by == 'Gate Staff'
+
+
+def test_users_without_a_last_name_have_a_name():
+    assert UserModel(email='scanner@ac.ac', first_name='Jane').name == 'Jane'
+    assert UserModel(email='scanner@ac.ac').name == 'scanner@ac.ac'
+
+
+class MemoryCache:
+    def __init__(self):
+        self.values: dict[str, Any] = {}
+
+    def get(self, key: str):
+        return self.values.get(key)
+
+    def set(self, key: str, value: Any, ttl: int | None = None) -> bool:
+        self.values[key] = value
+        return True
+
+
+@pytest.fixture
+def import_client(tmp_path, monkeypatch):
+    '''
+    A client of a company owner importing attendees to their event, whose
+    tickets are sent as they're rendered
+    '''
+
+    engine = create_engine(f'sqlite:///{tmp_path / "curox.db"}')
+    Base.metadata.create_all(engine)
+    db = DBSession(bind=engine, expire_on_commit=False)
+
+    owner = UserModel(email='owner@ac.ac', password='x', first_name='Jane')
+    db.add(owner)
+    db.flush()
+    company = CompanyModel(name='Curox', logo_path='logo.png', owner_id=owner.id)
+    db.add(company)
+    db.flush()
+    event = EventModel(name='Gala', venue='Hall', company_id=company.id,
+                       date_from=NOW, date_to=NOW + timedelta(days=365),
+                       created_by_id=owner.id, tables=[EventTableModel(name='Table 1')])
+    db.add(event)
+    db.commit()
+
+    def get_test_db():
+        yield db
+
+    auth = AuthContext(owner, staff_id=None, company_id=None, role=None,
+                       owned_company_ids=frozenset([company.id]),
+                       companies_repo=CompaniesRepo(db))
+    cache = MemoryCache()
+
+    async def send_event_tickets(event_name: str, ticket_ids: list[int]):
+        pass
+
+    monkeypatch.setattr(settings, 'ticket_render_mode', 'lazy')
+    monkeypatch.setattr(router, 'send_event_tickets', send_event_tickets)
+    app.dependency_overrides.update({
+        get_db: get_test_db,
+        get_auth_context: lambda: auth,
+        get_cache_manager: lambda: cache,
+        router.router.dependencies[0].dependency: lambda: 'token',
+    })
+    try:
+        yield TestClient(app), event
+    finally:
+        app.dependency_overrides.clear()
+        db.close()
+
+
+def test_attendees_are_imported(import_client):
+    client, event = import_client
+    url = reverse('event-attendees-bulk-create').format(event_id=event.id)
+    response = client.post(url, json=[
+        {'name': 'Ann', 'email': 'ann@ac.ac', 'price': 2000, 'table_id': event.tables[0].id},
+        {'name': 'Ann', 'email': 'ann@ac.ac', 'price': 2000},
+        {'name': 'Bob', 'email': 'bob@ac.ac'},
+    ])
+
+    assert response.status_code == 200
+    data = response.json()['data']
+    assert (data['created'], data['failed']) == (1, 2)
+    assert [row['created'] for row in data['rows']] == [True, False, False]
+
+    job_url = reverse('event-attendees-bulk-job').format(event_id=event.id, job_id=data['job_id'])
+    job = client.get(job_url).json()['data']
+    assert (job['status'], job['total']) == ('completed', 1)
+
+
+def test_attendees_are_imported_from_csv(import_client):
+    client, event = import_client
+    url = reverse('event-attendees-bulk-csv-create').format(event_id=event.id)
+    content = ('name,email,price,table\n'
+               'Ann,ann@ac.ac,2000,Table 1\n'
+               'Bob,bob@ac.ac,2000,Table 9\n')
+    response = client.post(url, files={'file': ('attendees.csv', content, 'text/csv')})
+
+    assert response.status_code == 200
+    rows = response.json()['data']['rows']
+    assert [row['created'] for row in rows] == [True, False]
+    assert rows[1]['error'] == 'This table does not exist'
+
+
+def test_unknown_import_jobs_are_not_found(import_client):
+    client, event = import_client
+    url = reverse('event-attendees-bulk-job').format(event_id=event.id, job_id='missing')
+
+    assert client.get(url).status_code == 404
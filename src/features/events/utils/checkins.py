@@ -0,0 +1,121 @@
+'''
+Streams the check-ins of an event as server-sent events.
+
+Scans are published to a redis channel per event once they are in the
+database, and every stream of the event forwards them along with running
+counters.
+'''
+
+import time
+from typing import AsyncIterator
+
+import redis
+from loguru import logger
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+
+from src.core.cache import get_async_binary_redis_client, get_redis_client
+from src.core.database import SessionLocal
+from src.features.events.repo import TicketsRepo
+from src.features.events.schemas import (EventCheckinCountSchema,
+                                         EventCheckinSchema,
+                                         EventCheckinTableCountSchema)
+
+# How often, in seconds, streams send fresh counters from the database
+CHECKIN_COUNT_INTERVAL = 30
+
+
+def get_checkins_channel(event_id: int) -> str:
+    return f'events:{event_id}:checkins'
+
+
+def publish_ticket_scans(event_id: int, ticket_ids: list[int]):
+    '''
+    Publishes scanned tickets to the check-in streams of their event
+    '''
+
+    if not ticket_ids:
+        return
+
+    db = SessionLocal()
+    try:
+        checkins = TicketsRepo(db).get_checkins(ticket_ids)
+    finally:
+        db.close()
+
+    channel = get_checkins_channel(event_id)
+    try:
+        pipe = get_redis_client().pipeline(transaction=False)
+        for code, name, table, scanned_at, user in checkins:
+            checkin = EventCheckinSchema(code=code,
+                                         name=name,
+                                         table=table,
+                                         scanned_at=scanned_at,
+                                         scanned_by=user.name if user is not None else None)
+            pipe.publish(channel, checkin.model_dump_json())
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.error("Could not publish check-ins for event '{}': {}", event_id, e)
+
+
+def get_checkin_counts(event_id: int) -> EventCheckinCountSchema:
+    db = SessionLocal()
+    try:
+        tables = [
+            EventCheckinTableCountSchema(table=table, total=total, scanned=scanned)
+            for table, total, scanned in TicketsRepo(db).get_checkin_counts(event_id)
+        ]
+    finally:
+        db.close()
+
+    return EventCheckinCountSchema(total=sum(table.total for table in tables),
+                                   scanned=sum(table.scanned for table in tables),
+                                   tables=tables)
+
+
+def format_event(name: str, data: BaseModel) -> str:
+    return f'event: {name}\ndata: {data.model_dump_json()}\n\n'
+
+
+async def stream_checkins(event_id: int) -> AsyncIterator[str]:
+    '''
+    Sends the check-in counters of an event followed by every scan and the
+    updated counters.
+
+    The counters are sent again from the database every
+    CHECKIN_COUNT_INTERVAL seconds, which also keeps the connection alive.
+    '''
+
+    # Counted before subscribing so a scan isn't counted and then added
+    # again. One that falls in between is counted at the next recount
+    counts = await run_in_threadpool(get_checkin_counts, event_id)
+    counted_at = time.monotonic()
+
+    pubsub = get_async_binary_redis_client().pubsub()
+    await pubsub.subscribe(get_checkins_channel(event_id))
+    try:
+        yield format_event('counts', counts)
+
+        while True:
+            if time.monotonic() - counted_at > CHECKIN_COUNT_INTERVAL:
+                counts = await run_in_threadpool(get_checkin_counts, event_id)
+                counted_at = time.monotonic()
+                yield format_event('counts', counts)
+
+            message = await pubsub.get_message(ignore_subscribe_messages=True,
+                                               timeout=1.0)
+            if message is None:
+                continue
+
+            checkin = EventCheckinSchema.model_validate_json(message['data'])
+            counts.scanned += 1
+            for table in counts.tables:
+                if table.table == checkin.table:
+                    table.scanned += 1
+                    break
+
+            yield format_event('checkin', checkin)
+            yield format_event('counts', counts)
+    finally:
+        await pubsub.unsubscribe()
+        await pubsub.aclose()
@@ -0,0 +1,132 @@
+'''
+Hands out ticket codes without checking if they're taken.
+
+Every event has its own shuffle of all the possible codes, see
+``TokenPermutation``, keyed by ``EventModel.ticket_code_key``. Sequence
+numbers are reserved in batches by bumping ``EventModel.ticket_code_seq`` so
+no two processes get the same ones, and each sequence number is turned into a
+code in memory.
+'''
+
+import hmac
+import threading
+from collections import deque
+from functools import lru_cache
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from src.common.exceptions import BadRequestException
+from src.common.utils.token import TOKEN_SPACE, TokenPermutation
+from src.core.config import settings
+from src.features.events.models import EventModel, EventTicketModel
+
+
+@lru_cache(maxsize=256)
+def get_event_permutation(key: str) -> TokenPermutation:
+    return TokenPermutation(bytes.fromhex(key))
+
+
+# The number of hex characters kept of a hashed ticket code in a manifest
+MANIFEST_HASH_LENGTH = 16
+
+
+def get_manifest_key(event_id: int, staff_id: int, device_id: str) -> str:
+    '''
+    Gets the key a scanning device hashes ticket codes with.
+
+    There are few enough codes to hash them all, so a manifest is only as
+    safe as its key. Every device gets its own key, and the key is never
+    part of a manifest.
+    '''
+
+    return hmac.digest(settings.secret_key.encode(),
+                       f'event-manifest:{event_id}:{staff_id}:{device_id}'.encode(),
+                       'sha256').hex()
+
+
+def hash_ticket_code(key: str, code: str) -> str:
+    '''
+    Hashes a ticket code for an offline scanning manifest so the manifest
+    can be checked against without giving out the codes themselves
+    '''
+
+    digest = hmac.digest(bytes.fromhex(key), code.encode(), 'sha256').hex()
+    return digest[:MANIFEST_HASH_LENGTH]
+
+
+class TicketCodeAllocator:
+    def __init__(self, batch_size: int):
+        self.batch_size = batch_size
+        # One lock per event, so reserving a batch for one event does not hold
+        # up allocations for the others
+        self._locks: dict[int, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+        self._reserved: dict[int, deque[int]] = {}
+        self._legacy: dict[int, bool] = {}
+        self._keys: dict[int, str] = {}
+
+    def _reserve(self, db: Session, event_id: int, size: int):
+        # The reservation is committed on its own connection so the sequence
+        # numbers are never handed out again, even if the caller rolls back
+        with db.get_bind().connect() as connection:
+            end, legacy, key = connection.execute(
+                update(EventModel)
+                .where(EventModel.id == event_id)
+                .values(ticket_code_seq=EventModel.ticket_code_seq + size)
+                .returning(EventModel.ticket_code_seq,
+                           EventModel.legacy_ticket_codes,
+                           EventModel.ticket_code_key)
+            ).one()
+            connection.commit()
+
+        start = end - size
+        if end > TOKEN_SPACE:
+            raise BadRequestException('This event has run out of ticket codes')
+
+        self._reserved.setdefault(event_id, deque()).extend(range(start, end))
+        self._legacy[event_id] = legacy
+        self._keys[event_id] = key
+
+    def _get_lock(self, event_id: int) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(event_id, threading.Lock())
+
+    def allocate(self, db: Session, event_id: int, count: int) -> list[str]:
+        '''
+        Gets ``count`` unused ticket codes for an event
+        '''
+
+        with self._get_lock(event_id):
+            reserved = self._reserved.get(event_id, deque())
+            if len(reserved) < count:
+                size = max(count - len(reserved), self.batch_size)
+                self._reserve(db, event_id, size)
+                reserved = self._reserved[event_id]
+
+            indices = [reserved.popleft() for _ in range(count)]
+            legacy = self._legacy[event_id]
+            key = self._keys[event_id]
+
+        permutation = get_event_permutation(key)
+        codes = [permutation.token(index) for index in indices]
+        if not legacy or not codes:
+            return codes
+
+        # Older tickets have random codes that may be anywhere in the shuffle
+        taken = set(
+            db.scalars(
+                select(EventTicketModel.code).filter(
+                    EventTicketModel.event_id == event_id,
+                    EventTicketModel.code.in_(codes),
+                )
+            )
+        )
+        if not taken:
+            return codes
+
+        codes = [code for code in codes if code not in taken]
+        return codes + self.allocate(db, event_id, len(taken))
+
+
+ticket_code_allocator = TicketCodeAllocator(settings.ticket_code_batch_size)
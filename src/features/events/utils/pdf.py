@@ -1,7 +1,7 @@
 import io
 from dataclasses import dataclass
 from datetime import datetime
-from typing import IO
+from typing import IO, Literal
 
 import pendulum
 import qrcode
@@ -10,6 +10,7 @@ from qrcode.image.styles.moduledrawers import (CircleModuleDrawer,
                                                RoundedModuleDrawer)
 from qrcode.main import QRCode
 from reportlab.lib import colors
+from reportlab.lib.boxstuff import aspectRatioFix
 from reportlab.lib.pagesizes import A5 as PDFPageSize
 from reportlab.lib.units import cm
 from reportlab.lib.utils import ImageReader
@@ -35,6 +36,90 @@ def generate_qrcode(code: str):
     return image_bytes
 
 
+# The finder patterns ("eyes") in the corners of a QR code are 7x7 modules
+QR_EYE_SIZE = 7
+
+# The blank modules a scanner needs around a QR code to find it
+QR_QUIET_ZONE = 4
+
+QRStyle = Literal['vector', 'raster']
+
+
+def get_qrcode_matrix(code: str) -> list[list[bool]]:
+    qr = QRCode(
+        border=0,
+        error_correction=qrcode.ERROR_CORRECT_H)
+    qr.add_data(code)
+    qr.make(fit=True)
+
+    return qr.get_matrix()
+
+
+def draw_qrcode(canvas: Canvas,
+                code: str,
+                x: float,
+                y: float,
+                size: float):
+    '''
+    Draws the QR code straight onto the canvas as vector shapes, in the same
+    style as ``generate_qrcode``: circular modules and rounded eyes.
+
+    The code and its quiet zone fit in the ``size`` square at ``x``, ``y``.
+    '''
+
+    matrix = get_qrcode_matrix(code)
+    modules = len(matrix)
+    box = size / (modules + 2 * QR_QUIET_ZONE)
+    eye_offset = modules - QR_EYE_SIZE
+    eyes = [(0, 0), (0, eye_offset), (eye_offset, 0)]
+
+    def in_eye(row: int, col: int) -> bool:
+        return any(
+            eye_row <= row < eye_row + QR_EYE_SIZE
+            and eye_col <= col < eye_col + QR_EYE_SIZE
+            for eye_row, eye_col in eyes
+        )
+
+    canvas.saveState()
+    canvas.setFillColor(colors.white)
+    canvas.rect(x, y, size, size, stroke=0, fill=1)
+
+    # Everything else is drawn inside the quiet zone
+    x += QR_QUIET_ZONE * box
+    y += QR_QUIET_ZONE * box
+    size -= 2 * QR_QUIET_ZONE * box
+
+    # Every module goes in one path so they're filled at once
+    radius = box / 2
+    path = canvas.beginPath()
+    for row, modules_row in enumerate(matrix):
+        for col, is_dark in enumerate(modules_row):
+            if is_dark and not in_eye(row, col):
+                path.circle(x + (col + 0.5) * box, y + size - (row + 0.5) * box, radius)
+
+    canvas.setFillColor(colors.black)
+    canvas.drawPath(path, stroke=0, fill=1)
+
+    for eye_row, eye_col in eyes:
+        eye_x = x + eye_col * box
+        eye_y = y + size - (eye_row + QR_EYE_SIZE) * box
+
+        canvas.setFillColor(colors.black)
+        canvas.roundRect(eye_x, eye_y,
+                         QR_EYE_SIZE * box, QR_EYE_SIZE * box,
+                         radius, stroke=0, fill=1)
+        canvas.setFillColor(colors.white)
+        canvas.rect(eye_x + box, eye_y + box,
+                    (QR_EYE_SIZE - 2) * box, (QR_EYE_SIZE - 2) * box,
+                    stroke=0, fill=1)
+        canvas.setFillColor(colors.black)
+        canvas.roundRect(eye_x + 2 * box, eye_y + 2 * box,
+                         (QR_EYE_SIZE - 4) * box, (QR_EYE_SIZE - 4) * box,
+                         radius, stroke=0, fill=1)
+
+    canvas.restoreState()
+
+
 unit = cm
 padding = 0.5 * unit
 canvas_width = PDFPageSize[0]
@@ -85,145 +170,215 @@ def draw_text(canvas: Canvas,
         canvas.setFillColor(Config.text_color)
 
 
+@dataclass
+class TextRun:
+    text: str
+    x: float
+    y: float
+    font_name: str = Config.font_name
+    font_size: int = Config.font_size
+    text_color: colors.Color = Config.text_color
+
+
+class TicketTemplate:
+    '''
+    The parts of a ticket that are the same for every ticket of an event.
+
+    The logo is decoded and the header is laid out once, each ticket is then
+    stamped with only its QR code, attendee table and total.
+    '''
+
+    def __init__(self,
+                 logo: ImageReader,
+                 event_name: str,
+                 event_venue: str,
+                 event_date: datetime,
+                 logo_size: tuple[int, int] | None = None):
+        '''
+        ``logo_size`` is the size the logo is laid out with, it defaults to the
+        size of the logo and allows drawing a scaled down logo in its place.
+        '''
+
+        # Handle the logo
+        logo_w, logo_h = logo_size or logo.getSize()
+        logo_aspect = logo_w / logo_h
+
+        # Ensure the logo is never more than 60% wide
+        logo_w = min(logo_w, 0.6 * canvas_width)
+        # Ensure the logo in never more than 10% high
+        logo_h = min(logo_w / logo_aspect, 0.15 * canvas_height)
+
+        logo_top = from_top_percent(0) - logo_h - padding
+        # The reader keeps the decoded pixels for every ticket drawn with it
+        logo.getRGBData()
+        self.logo = logo
+        image_w, image_h = logo_size or logo.getSize()
+        self.logo_box = aspectRatioFix(True, 'c',
+                                       from_left_percent(0.5) - logo_w / 2,
+                                       logo_top,
+                                       logo_w,
+                                       logo_h,
+                                       image_w,
+                                       image_h)[:4]
+
+        # Lay out the event name, venue, date and time
+        self.texts: list[TextRun] = []
+        y_top = logo_top - 1.25 * unit
+        self._add_text(event_name, y=y_top, font_size=24)
+        y_top -= 24
+
+        leading_size = Config.font_size + 0.2 * unit
+        self._add_text(event_venue, y=y_top, font_name='Helvetica-Bold')
+        y_top -= leading_size
+
+        event_date = pendulum.instance(event_date)
+        date_color = colors.Color(red=0, green=0, blue=0, alpha=0.6)
+        self._add_text(event_date.format('dddd, MMMM Do, YYYY'),
+                       y=y_top,
+                       text_color=date_color)
+        y_top -= leading_size
+
+        self._add_text(event_date.format('h:mm A'), y=y_top, text_color=date_color)
+        y_top -= leading_size
+
+        self.y_top = y_top
+
+    def _add_text(self, text: str, y: float, **kwargs):
+        font_name = kwargs.get('font_name', Config.font_name)
+        font_size = kwargs.get('font_size', Config.font_size)
+        text_width = stringWidth(text, fontName=font_name, fontSize=font_size)
+        x = from_left_percent(0.5) - text_width / 2
+        self.texts.append(TextRun(text, x=x, y=y, **kwargs))
+
+    def draw(self, canvas: Canvas):
+        '''
+        Draws the event parts of the ticket
+        '''
+
+        x, y, width, height = self.logo_box
+        canvas.drawImage(self.logo, x, y, width, height)
+        for text in self.texts:
+            draw_text(canvas,
+                      text=text.text,
+                      x=text.x,
+                      y=text.y,
+                      font_name=text.font_name,
+                      font_size=text.font_size,
+                      text_color=text.text_color)
+
+    def stamp(self,
+              file: str | IO[bytes],
+              code: str,
+              table_records: list[dict],
+              qr_style: QRStyle = 'vector'):
+        '''
+        Draws a ticket of the event
+        '''
+
+        canvas = Canvas(file, pagesize=PDFPageSize)
+        canvas.setFont(Config.font_name, Config.font_size)
+
+        # Handle the QR Code
+        qr_code_image_w = 2 * unit
+        qr_code_image_h = qr_code_image_w
+        qr_code_x = from_left_percent(0.5) - qr_code_image_w / 2
+        qr_code_y = from_top_percent(1) + padding
+        if qr_style == 'vector':
+            draw_qrcode(canvas,
+                        code,
+                        x=qr_code_x,
+                        y=qr_code_y,
+                        size=qr_code_image_w)
+        else:
+            qr_code = generate_qrcode(code)
+            qr_code = ImageReader(qr_code)
+            canvas.drawImage(qr_code,
+                             x=qr_code_x,
+                             y=qr_code_y,
+                             width=qr_code_image_w,
+                             height=qr_code_image_h)
+
+        self.draw(canvas)
+        y_top = self.y_top
+
+        # Draw the ticket table
+        table_data = [
+            ['#', 'Ticket', 'Table', 'Amount'],
+        ]
+
+        total_price = 0
+        max_name_width = 0
+        for i, record in enumerate(table_records):
+            price: int = record['price']
+            total_price += price
+
+            name = record['name']
+            name_width = stringWidth(name,
+                                     fontName=Config.font_name,
+                                     fontSize=Config.font_size)
+            if name_width > max_name_width:
+                max_name_width = name_width
+
+            table_name: str = record['table']
+            table_data.append([f'{i+1}', name, table_name, f'{price}'])
+
+        y_top -= 2 * unit
+        y_top -= 0.1 * unit
+        max_height = 1 * unit
+        max_width = canvas_width - 2 * padding
+
+        first_col = 0.75 * unit
+        last_col = 2 * unit
+        ticket_col = max_name_width + 0.5 * unit
+        table_col = max_width - (first_col + ticket_col + last_col)
+        header_color = colors.Color(red=0, green=0, blue=0.2)
+        table = Table(data=table_data,
+                      colWidths=[first_col, ticket_col, table_col, last_col],
+                      style=TableStyle([('BACKGROUND', (0, 0), (-1, 0), header_color),
+                                        ('TEXTCOLOR',  (0, 0), (-1, 0), colors.white),
+                                        ('ALIGN',      (0, 0), (0, -1), 'CENTER'),
+                                        ('ALIGN',      (-1, 0),(-1, -1), 'RIGHT')]))
+
+        _, table_h = table.wrapOn(canvas, max_width, max_height)
+
+        table_x = padding
+        table.drawOn(canvas, table_x, y_top)
+
+        y_top -= table_h + 0.5 * unit
+
+        price_container_width = canvas_width / 2
+        price_container_height = Config.font_size + (0.5 * unit)
+        canvas.setFillColor(Config.accent_color)
+        canvas.rect(x=from_left_percent(0.5) - price_container_width / 2,
+                    y=y_top,
+                    width=price_container_width,
+                    height=price_container_height,
+                    stroke=0,
+                    fill=1)
+        canvas.setFillColor(Config.background)
+
+
+        draw_text(canvas,
+                  f'KES. {total_price}',
+                  y=y_top + Config.font_size - 0.1 * unit,
+                  font_name='Helvetica-Bold')
+
+        canvas.save()
+
+
 def generate_pdf(file: str | IO[bytes],
                  code: str,
                  logo: io.BytesIO,
                  event_name: str,
                  event_venue: str,
                  event_date: datetime,
-                 table_records: list[dict]):
-    canvas = Canvas(file, pagesize=PDFPageSize)
-    canvas.setFont(Config.font_name, Config.font_size)
-
-    # Handle the QR Code
-    qr_code = generate_qrcode(code)
-    qr_code = ImageReader(qr_code)
-    qr_code_image_w = 2 * unit
-    qr_code_image_h = qr_code_image_w
-    canvas.drawImage(qr_code,
-                     x=from_left_percent(0.5) - qr_code_image_w / 2,
-                     y=from_top_percent(1) + padding,
-                     width=qr_code_image_w,
-                     height=qr_code_image_h)
-
-    # Handle the logo
-    logo_img = ImageReader(logo)
-    logo_w, logo_h = logo_img.getSize()
-    logo_aspect = logo_w / logo_h
-
-    # Ensure the logo is never more than 60% wide
-    logo_w = min(logo_w, 0.6 * canvas_width)
-    # Ensure the logo in never more than 10% high
-    logo_h = min(logo_w / logo_aspect, 0.15 * canvas_height)
-
-    logo_top = from_top_percent(0) - logo_h - padding
-    canvas.drawImage(logo_img,
-                     x=from_left_percent(0.5) - logo_w / 2,
-                     y=logo_top,
-                     preserveAspectRatio=True,
-                     width=logo_w,
-                     height=logo_h)
-
-    # Draw the event name
-    y_top = logo_top - 1.25 * unit
-    draw_text(canvas,
-              text=event_name,
-              y=y_top,
-              font_size=24)
-    y_top -= 24
-
-    # Draw the event venue
-    leading_size = Config.font_size + 0.2 * unit
-    draw_text(canvas,
-              text=event_venue,
-              y=y_top,
-              font_name='Helvetica-Bold')
-    y_top -= leading_size
-
-    # Draw the event date and time
-    text_color = Config.text_color
-    text_alpha = 0.6
-    text_color.alpha = text_alpha
-
-    event_date = pendulum.instance(event_date)
-    date = event_date.format('dddd, MMMM Do, YYYY')
-    draw_text(canvas,
-              text=date,
-              y=y_top,
-              text_color=text_color,
-              restore_color=False)
-    y_top -= leading_size
-
-    time = event_date.format('h:mm A')
-    draw_text(canvas,
-              text=time,
-              y=y_top)
-    canvas.setFillColor(Config.text_color)
-    y_top -= leading_size
-
-    # Draw the ticket table
-    table_data = [
-        ['#', 'Ticket', 'Table', 'Amount'],
-    ]
-
-    total_price = 0
-    max_name_width = 0
-    for i, record in enumerate(table_records):
-        price: int = record['price']
-        total_price += price
-
-        name = record['name']
-        name_width = stringWidth(name,
-                                 fontName=Config.font_name,
-                                 fontSize=Config.font_size)
-        if name_width > max_name_width:
-            max_name_width = name_width
-
-        table_name: str = record['table']
-        table_data.append([f'{i+1}', name, table_name, f'{price}'])
-    
-    y_top -= 2 * unit
-    y_top -= 0.1 * unit
-    max_height = 1 * unit
-    max_width = canvas_width - 2 * padding
-
-    first_col = 0.75 * unit
-    last_col = 2 * unit
-    ticket_col = max_name_width + 0.5 * unit
-    table_col = max_width - (first_col + ticket_col + last_col)
-    header_color = colors.Color(red=0, green=0, blue=0.2)
-    table = Table(data=table_data,
-                  colWidths=[first_col, ticket_col, table_col, last_col],
-                  style=TableStyle([('BACKGROUND', (0, 0), (-1, 0), header_color),
-                                    ('TEXTCOLOR',  (0, 0), (-1, 0), colors.white),
-                                    ('ALIGN',      (0, 0), (0, -1), 'CENTER'),
-                                    ('ALIGN',      (-1, 0),(-1, -1), 'RIGHT')]))
-
-    _, table_h = table.wrapOn(canvas, max_width, max_height)
-
-    table_x = padding
-    table.drawOn(canvas, table_x, y_top)
-
-    y_top -= table_h + 0.5 * unit
-
-    price_container_width = canvas_width / 2
-    price_container_height = Config.font_size + (0.5 * unit)
-    canvas.setFillColor(Config.accent_color)
-    canvas.rect(x=from_left_percent(0.5) - price_container_width / 2,
-                y=y_top,
-                width=price_container_width,
-                height=price_container_height,
-                stroke=0,
-                fill=1)
-    canvas.setFillColor(Config.background)
-
-
-    draw_text(canvas,
-              f'KES. {total_price}',
-              y=y_top + Config.font_size - 0.1 * unit,
-              font_name='Helvetica-Bold')
-
-    canvas.save()
+                 table_records: list[dict],
+                 qr_style: QRStyle = 'vector'):
+    template = TicketTemplate(ImageReader(logo),
+                              event_name=event_name,
+                              event_venue=event_venue,
+                              event_date=event_date)
+    template.stamp(file, code=code, table_records=table_records, qr_style=qr_style)
 
 if __name__ == '__main__':
     event_name = 'OSS Charity Gala 2023'
@@ -0,0 +1,222 @@
+'''
+Decides ticket scans in redis when ``scan_state_enabled`` is set, see
+``ScanStateCache``. The scans are written to the database in batches by
+``flush_ticket_scans``.
+'''
+
+import json
+import threading
+from datetime import datetime
+
+import redis
+from loguru import logger
+from pydantic import ValidationError
+from sqlalchemy.orm import Session, joinedload
+from starlette.concurrency import run_in_threadpool
+
+from src.core.cache import ScanStateCache
+from src.core.config import settings
+from src.core.database import SessionLocal
+from src.features.companies.models import StaffModel
+from src.features.events.models import EventAttendeeModel, EventTicketModel
+from src.features.events.repo import TicketsRepo
+from src.features.events.schemas import EventAttendeeSchema
+from src.features.events.utils.checkins import publish_ticket_scans
+from src.features.events.utils.ticket import notify_user_of_ticket_scan
+
+# How long a flush can hold the flush lock of an event
+FLUSH_LOCK_TIMEOUT = 60
+
+_scan_state: ScanStateCache | None = None
+
+# Events this process scanned tickets of in the database while redis was
+# down. Redis doesn't know about those scans until the event is loaded again
+_unsynced_events: set[int] = set()
+_unsynced_events_lock = threading.Lock()
+
+
+def get_scan_state() -> ScanStateCache:
+    global _scan_state
+    if _scan_state is None:
+        _scan_state = ScanStateCache(ttl=settings.scan_state_ttl)
+    return _scan_state
+
+
+def dump_scan(staff_id: int, name: str | None, scanned_at: datetime) -> str:
+    return json.dumps({'staff_id': staff_id, 'by': name, 'at': scanned_at.isoformat()})
+
+
+def dump_attendee(attendee: EventAttendeeModel) -> str:
+    return EventAttendeeSchema.model_validate(attendee).model_dump_json()
+
+
+def load_scan_state(db: Session, event_id: int):
+    '''
+    Loads the tickets of an event into redis
+    '''
+
+    ticket = joinedload(EventAttendeeModel.ticket)
+    attendees = (
+        db.query(EventAttendeeModel)
+        .options(ticket.joinedload(EventTicketModel.table),
+                 ticket.joinedload(EventTicketModel.scanned_by)
+                 .joinedload(StaffModel.user))
+        .filter(EventAttendeeModel.event_id == event_id)
+        .all()
+    )
+
+    tickets: dict[str, str] = {}
+    scans: dict[str, str] = {}
+    for attendee in attendees:
+        ticket = attendee.ticket
+        if ticket is None:
+            continue
+
+        tickets[ticket.code] = dump_attendee(attendee)
+        if ticket.is_scanned:
+            scans[ticket.code] = dump_scan(ticket.scanned_by_id,
+                                           ticket.scanned_by.user.name,
+                                           ticket.scanned_at)
+
+    get_scan_state().load(event_id, tickets, scans)
+
+
+def scan_tickets_in_cache(db: Session,
+                          event_id: int,
+                          scans: dict[str, datetime],
+                          staff_id: int,
+                          staff_name: str | None) -> dict[str, tuple[int, dict]] | None:
+    '''
+    Scans tickets in redis.
+
+    Returns the status of every code along with its attendee if it was
+    scanned or its earlier scan if it was a duplicate. Codes that aren't in
+    redis, like those of tickets added after the event was loaded, are left
+    out so they can be scanned in the database. Returns None if redis can't
+    be used.
+    '''
+
+    state = get_scan_state()
+    items = [
+        (code,
+         dump_scan(staff_id, staff_name, scanned_at),
+         json.dumps({'code': code, 'staff_id': staff_id, 'at': scanned_at.isoformat()}))
+        for code, scanned_at in scans.items()
+    ]
+    try:
+        with _unsynced_events_lock:
+            unsynced = event_id in _unsynced_events
+        if unsynced or not state.is_loaded(event_id):
+            load_scan_state(db, event_id)
+            with _unsynced_events_lock:
+                _unsynced_events.discard(event_id)
+
+        results = state.scan(event_id, items)
+    except (redis.RedisError, ValidationError) as e:
+        # The tickets are scanned in the database instead
+        logger.error("Could not scan tickets in redis for event '{}': {}", event_id, e)
+        return None
+
+    scanned: dict[str, tuple[int, dict]] = {}
+    for (code, _, _), (status, value) in zip(items, results):
+        if status == state.not_found:
+            continue
+
+        data = json.loads(value)
+        if status == state.scanned:
+            data['ticket']['scanned_at'] = scans[code].isoformat()
+        scanned[code] = (status, data)
+
+    return scanned
+
+
+def record_ticket_scans(event_id: int,
+                        scans: dict[str, datetime],
+                        staff_id: int,
+                        staff_name: str | None):
+    '''
+    Tells redis about tickets scanned in the database, so they aren't let
+    in again when scans are decided in redis
+    '''
+
+    if not scans:
+        return
+
+    try:
+        get_scan_state().record(event_id, {
+            code: dump_scan(staff_id, staff_name, scanned_at)
+            for code, scanned_at in scans.items()
+        })
+    except redis.RedisError as e:
+        logger.error("Could not record ticket scans in redis for event '{}': {}", event_id, e)
+        with _unsynced_events_lock:
+            _unsynced_events.add(event_id)
+
+
+def write_ticket_scans(event_id: int) -> list[int]:
+    '''
+    Writes the scans decided in redis to the database in batches, returning
+    the ids of the scanned tickets. It blocks, so it's run in a thread
+    '''
+
+    state = get_scan_state()
+    ticket_ids: list[int] = []
+
+    # Scans that come in after the last batch was taken but before the lock
+    # is released are left for another round
+    while (token := state.lock_flush(event_id, timeout=FLUSH_LOCK_TIMEOUT)) is not None:
+        failed = False
+        db = SessionLocal()
+        try:
+            repo = TicketsRepo(db)
+            while pending := state.pop_pending(event_id, settings.scan_flush_batch_size):
+                staff_scans: dict[int, dict[str, datetime]] = {}
+                for item in pending:
+                    scan = json.loads(item)
+                    scanned_at = datetime.fromisoformat(scan['at'])
+                    staff_scans.setdefault(scan['staff_id'], {})[scan['code']] = scanned_at
+
+                try:
+                    for staff_id, scans in staff_scans.items():
+                        scanned = repo.scan_many(event_id, scans, scanned_by_id=staff_id)
+                        ticket_ids.extend(scanned.values())
+
+                        # Scanned in the database without redis knowing, so
+                        # these tickets were let in twice
+                        skipped = [code for code in scans if code not in scanned]
+                        if skipped:
+                            logger.warning("Tickets {} of event '{}' were scanned again, "
+                                           "they had already been scanned in the database",
+                                           skipped, event_id)
+                except Exception as e:
+                    logger.error("Could not flush ticket scans for event '{}': {}", event_id, e)
+                    state.requeue_pending(event_id, pending)
+                    failed = True
+                    break
+        finally:
+            db.close()
+            state.unlock_flush(event_id, token)
+
+        if failed or not state.has_pending(event_id):
+            break
+
+    # When the lock is taken, another flush is running and will pick the
+    # scans up
+    return ticket_ids
+
+
+async def flush_ticket_scans(event_id: int, event_name: str):
+    '''
+    Writes the scans decided in redis to the database, then notifies the
+    attendees
+    '''
+
+    ticket_ids = await run_in_threadpool(write_ticket_scans, event_id)
+    if not ticket_ids:
+        return
+
+    logger.info("Flushed {} ticket scans for event '{}'", len(ticket_ids), event_id)
+
+    await run_in_threadpool(publish_ticket_scans, event_id, ticket_ids)
+    for ticket_id in ticket_ids:
+        await notify_user_of_ticket_scan(event_name, ticket_id)
@@ -1,54 +1,297 @@
+import asyncio
 import io
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import cast
+from typing import Any, cast
 
 import pendulum
 from fastapi import UploadFile
+from reportlab.lib.utils import ImageReader
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
+from src.core.cache import AsyncCacheManager
+from src.core.config import settings
 from src.core.database import SessionLocal
 from src.core.logger import logger
 from src.core.mail import send_email
 from src.core.sms import send_sms
 from src.core.storage.backend import storage_backend
+from src.features.companies.utils import CompanyLogo, get_company_logo
 from src.features.events.models import EventModel, EventTicketModel
 
-from .pdf import generate_pdf
+from .pdf import TicketTemplate
 
+# Bulk imports keep their job state around for a day
+IMPORT_JOB_TTL = 60 * 60 * 24
 
-def generate_ticket(
-    code: str,
-    logo: io.BytesIO,
+# The number of event ticket templates kept in memory
+TEMPLATE_CACHE_SIZE = 32
+
+_render_pool: ProcessPoolExecutor | None = None
+
+_templates: OrderedDict[tuple, TicketTemplate] = OrderedDict()
+_templates_lock = threading.Lock()
+
+
+def get_ticket_path(company_id: int, event_id: int, code: str) -> str:
+    """
+    Gets the storage path of a ticket pdf
+    """
+
+    return f"companies/{company_id}/tickets/{event_id}/ticket_{event_id}_{code}.pdf"
+
+
+def get_ticket_template(
+    event_id: int,
+    logo: CompanyLogo,
     event_name: str,
     event_venue: str,
     event_date: datetime,
+) -> TicketTemplate:
+    """
+    Gets the ticket template of an event, building it if it's not cached
+    """
+
+    key = (event_id, event_name, event_venue, event_date, logo.digest)
+    with _templates_lock:
+        template = _templates.get(key)
+        if template is not None:
+            _templates.move_to_end(key)
+            return template
+
+    template = TicketTemplate(
+        ImageReader(logo.image),
+        event_name=event_name,
+        event_venue=event_venue,
+        event_date=event_date,
+        logo_size=(logo.width, logo.height),
+    )
+    with _templates_lock:
+        _templates[key] = template
+        while len(_templates) > TEMPLATE_CACHE_SIZE:
+            _templates.popitem(last=False)
+
+    return template
+
+
+def render_ticket(
+    code: str,
+    template: TicketTemplate,
     attendees_data: list[dict],
-    company_id: int,
-    event_id: int,
-) -> str:
+) -> bytes:
     """
-    Generates and saves the ticket pdf sent to the client
+    Renders the ticket pdf sent to the client
     """
 
     pdf_file = io.BytesIO()
     try:
-        generate_pdf(
+        template.stamp(
             pdf_file,
-            logo=logo,
             code=code,
-            event_name=event_name,
-            event_venue=event_venue,
-            event_date=event_date,
             table_records=attendees_data,
+            qr_style=settings.ticket_qr_style,
         )
-
-        path = (
-            f"/companies/{company_id}/tickets/{event_id}/ticket_{event_id}_{code}.pdf"
-        )
-        url = storage_backend.upload_file(pdf_file, path)
+        return pdf_file.getvalue()
     finally:
         pdf_file.close()
 
-    return url
+
+def generate_ticket(
+    code: str,
+    template: TicketTemplate,
+    attendees_data: list[dict],
+    company_id: int,
+    event_id: int,
+) -> str:
+    """
+    Generates and saves the ticket pdf sent to the client
+    """
+
+    pdf = render_ticket(code, template=template, attendees_data=attendees_data)
+
+    path = get_ticket_path(company_id, event_id, code)
+    return storage_backend.upload_file(io.BytesIO(pdf), path)
+
+
+def get_ticket_pdf(db: Session, ticket: EventTicketModel) -> bytes:
+    """
+    Gets a ticket's pdf from storage, rendering and saving it the first time
+    it's needed
+    """
+
+    if ticket.url is not None:
+        pdf = storage_backend.get_file(ticket.url)
+        if pdf is not None:
+            return pdf
+
+    event = cast(EventModel, ticket.event)
+    company = event.company
+    template = get_ticket_template(
+        event.id,
+        get_company_logo(company.id, company.logo_path),
+        event_name=event.name,
+        event_venue=event.venue,
+        event_date=event.date_from,
+    )
+
+    table = ticket.table
+    attendees_data = [
+        {
+            "name": ticket.attendee.name,
+            "price": ticket.price,
+            "table": table.name if table is not None else None,
+        }
+    ]
+    pdf = render_ticket(ticket.code, template=template, attendees_data=attendees_data)
+
+    path = get_ticket_path(event.company_id, event.id, ticket.code)
+    ticket.url = storage_backend.upload_file(io.BytesIO(pdf), path)
+    db.add(ticket)
+    db.commit()
+
+    return pdf
+
+
+def render_ticket_batch(
+    logo: CompanyLogo,
+    event_name: str,
+    event_venue: str,
+    event_date: datetime,
+    company_id: int,
+    event_id: int,
+    tickets: list[tuple[str, list[dict]]],
+) -> list[tuple[str, str | None]]:
+    """
+    Renders a batch of tickets, returning the error (if any) of every ticket code.
+
+    This runs in the render pool's worker processes so it only takes picklable
+    arguments.
+    """
+
+    template = get_ticket_template(
+        event_id,
+        logo,
+        event_name=event_name,
+        event_venue=event_venue,
+        event_date=event_date,
+    )
+
+    results: list[tuple[str, str | None]] = []
+    for code, attendees_data in tickets:
+        try:
+            generate_ticket(
+                code,
+                template=template,
+                attendees_data=attendees_data,
+                company_id=company_id,
+                event_id=event_id,
+            )
+            results.append((code, None))
+        except Exception as e:
+            results.append((code, str(e)))
+
+    return results
+
+
+def get_render_pool() -> ProcessPoolExecutor:
+    """
+    Gets (or creates) the process pool used to render tickets in bulk
+    """
+
+    global _render_pool
+    if _render_pool is None:
+        _render_pool = ProcessPoolExecutor(
+            max_workers=settings.ticket_render_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    return _render_pool
+
+
+def get_import_job_key(event_id: int, job_id: str) -> str:
+    return f"events:{event_id}:imports:{job_id}"
+
+
+async def render_imported_tickets(
+    job_id: str,
+    logo: CompanyLogo,
+    event_name: str,
+    event_venue: str,
+    event_date: datetime,
+    company_id: int,
+    event_id: int,
+    tickets: list[tuple[int, str, list[dict]]],
+):
+    """
+    Renders the tickets of a bulk import across the render pool, then sends them
+    to the attendees.
+
+    ``tickets`` holds the ticket id, code and table records of every ticket.
+    """
+
+    logger.info("Rendering {} imported tickets for job '{}'", len(tickets), job_id)
+
+    cache = AsyncCacheManager[dict[str, Any]](ttl=IMPORT_JOB_TTL)
+    job_key = get_import_job_key(event_id, job_id)
+    job: dict[str, Any] = {
+        "job_id": job_id,
+        "status": "rendering",
+        "total": len(tickets),
+        "rendered": 0,
+        "failed": 0,
+    }
+    await cache.set(job_key, job)
+
+    loop = asyncio.get_running_loop()
+    pool = get_render_pool()
+    batch_size = settings.ticket_render_batch_size
+    futures = []
+    for start in range(0, len(tickets), batch_size):
+        batch = [(code, data) for _, code, data in tickets[start : start + batch_size]]
+        futures.append(
+            loop.run_in_executor(
+                pool,
+                render_ticket_batch,
+                logo,
+                event_name,
+                event_venue,
+                event_date,
+                company_id,
+                event_id,
+                batch,
+            )
+        )
+
+    failed_codes: set[str] = set()
+    for future in asyncio.as_completed(futures):
+        try:
+            results = await future
+        except Exception as e:
+            logger.error("Ticket render batch failed for job '{}': {}", job_id, e)
+            job["status"] = "failed"
+            await cache.set(job_key, job)
+            return
+
+        for code, error in results:
+            if error is None:
+                job["rendered"] += 1
+            else:
+                logger.error("Could not render ticket '{}': {}", code, error)
+                failed_codes.add(code)
+                job["failed"] += 1
+
+        await cache.set(job_key, job)
+
+    job["status"] = "completed"
+    await cache.set(job_key, job)
+
+    for ticket_id, code, _ in tickets:
+        if code not in failed_codes:
+            await send_event_ticket(event_name, ticket_id)
 
 
 async def send_event_ticket(event_name: str, ticket_id: int):
@@ -65,9 +308,7 @@ async def send_event_ticket(event_name: str, ticket_id: int):
         subject = event_name
         to: str = ticket.attendee.email
 
-        ticket_file = storage_backend.get_file(ticket.url)
-        if ticket_file is None:
-            return
+        ticket_file = await run_in_threadpool(get_ticket_pdf, db, ticket)
 
         file_io = io.BytesIO(ticket_file)
         prepared_event_name = event_name.replace(" ", "_").lower()
@@ -92,6 +333,11 @@ async def send_event_ticket(event_name: str, ticket_id: int):
         db.close()
 
 
+async def send_event_tickets(event_name: str, ticket_ids: list[int]):
+    for ticket_id in ticket_ids:
+        await send_event_ticket(event_name, ticket_id)
+
+
 async def notify_user_of_ticket_scan(event_name: str, ticket_id: int):
     """
     Notifies the user by sms when their ticket has been scanned
@@ -1,5 +1,9 @@
+import csv
+import hashlib
+import io
+import uuid
 from datetime import datetime, timedelta
-from typing import Annotated, cast
+from typing import Annotated, Any, cast
 
 import pendulum
 from fastapi import (
@@ -7,22 +11,35 @@ from fastapi import (
     BackgroundTasks,
     Body,
     Depends,
-    HTTPException,
+    File,
     Path,
+    Query,
     Request,
-    status,
+    Response,
+    UploadFile,
 )
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 
 from src.common.exceptions import (
     BadRequestException,
     NotFoundException,
     UnauthorisedException,
 )
+from src.common.pagination import PageParamsDep
+from src.common.schemas import Page
 from src.common.utils.responses import CustomResponse, build_response
 from src.core.auth.bearer import JWTBearer
+from src.core.cache import CacheDep, ScanStateCache
+from src.core.config import settings
 from src.features.auth.models import UserModel
-from src.features.companies.dependencies import CompaniesRepoDep, StaffRepoDep
-from src.features.companies.models import CompanyModel, StaffModel, StaffRole
+from src.features.companies.dependencies import (
+    AuthContext,
+    AuthContextDep,
+    CompaniesRepoDep,
+)
+from src.features.companies.models import CompanyModel, StaffRole
+from src.features.companies.utils import get_company_logo
 from src.features.events.models import (
     EventAttendeeModel,
     EventModel,
@@ -32,15 +49,36 @@ from src.features.events.models import (
 )
 from src.features.events.schemas import (
     EventAttendeeCreateSchema,
+    EventAttendeeImportJobSchema,
+    EventAttendeeImportRowSchema,
+    EventAttendeeImportSchema,
     EventAttendeeSchema,
     EventCreateSchema,
     EventDetailsSchema,
     EventSchema,
     EventTableSchema,
+    EventTicketManifestEntrySchema,
+    EventTicketManifestKeySchema,
+    EventTicketManifestSchema,
+    EventTicketScanResultSchema,
+    EventTicketScanSchema,
+    EventTicketScansSchema,
+)
+from src.features.events.utils.checkins import publish_ticket_scans, stream_checkins
+from src.features.events.utils.codes import get_manifest_key, hash_ticket_code
+from src.features.events.utils.scans import (
+    flush_ticket_scans,
+    record_ticket_scans,
+    scan_tickets_in_cache,
 )
 from src.features.events.utils.ticket import (
+    IMPORT_JOB_TTL,
+    get_import_job_key,
     notify_user_of_ticket_scan,
+    render_imported_tickets,
+    get_ticket_pdf,
     send_event_ticket,
+    send_event_tickets,
 )
 
 from ..dependencies import (
@@ -54,13 +92,27 @@ router = APIRouter(
     prefix="/events", dependencies=[Depends(JWTBearer())], tags=["Events"]
 )
 
+# The maximum number of attendees that can be imported at once
+MAX_IMPORT_ROWS = 5000
+
+# The maximum number of offline scans that can be uploaded at once
+MAX_SYNC_SCANS = 5000
+
+# The maximum number of tickets a gate can scan at once
+MAX_BATCH_SCANS = 500
+
+ManifestDeviceIdQuery = Annotated[
+    str,
+    Query(min_length=1, max_length=64, description="The scanning device the manifest is for"),
+]
+
 
 @router.post("/", name="event-create", response_model=CustomResponse[EventSchema])
 def create_event(
     request: Request,
     event_data: EventCreateSchema,
     repo: EventsRepoDep,
-    staff_repo: StaffRepoDep,
+    auth: AuthContextDep,
     company_repo: CompaniesRepoDep,
 ):
     """
@@ -69,21 +121,15 @@ def create_event(
     user: UserModel = request.user
 
     company_id = event_data.company_id
-    db_company = cast(CompanyModel, company_repo.get_by_id(company_id))
-    if db_company is None:
+    if not company_repo.exists(CompanyModel.id == company_id):
         raise NotFoundException("This company does not exists")
 
-    # TODO: Extract this into a dependency
-    staff = staff_repo.get_by_column(StaffModel.user_id == user.id)
-    if staff:
-        if not (
-            staff.has_role(StaffRole.creator)
-            and cast(int, staff.company_id) == company_id
-        ):
+    if auth.is_staff:
+        if not (auth.has_role(StaffRole.creator) and auth.company_id == company_id):
             raise UnauthorisedException()
     else:
         # Check if user is owner
-        if cast(int, db_company.owner_id) != user.id:
+        if not auth.owns(company_id):
             raise UnauthorisedException()
 
     event = repo.create_one(creator=user, event_data=event_data)
@@ -110,28 +156,13 @@ EventDep = Annotated[EventModel, Depends(get_event)]
 @event_router.get(
     "/", name="event-details", response_model=CustomResponse[EventDetailsSchema]
 )
-def get_event_details(
-    request: Request,
-    event: EventDep,
-    staff_repo: StaffRepoDep,
-    company_repo: CompaniesRepoDep,
-):
+def get_event_details(event: EventDep, auth: AuthContextDep):
     """
     Gets the details of an event
     """
 
-    user: UserModel = request.user
-
-    staff = staff_repo.get_by_column(StaffModel.user_id == user.id)
-    if staff:
-        if event.company_id != staff.company_id:
-            raise UnauthorisedException()
-    else:
-        exists = company_repo.exists(
-            CompanyModel.id == event.company_id, CompanyModel.owner_id == user.id
-        )
-        if not exists:
-            raise UnauthorisedException()
+    if not auth.is_member_of(event.company_id):
+        raise UnauthorisedException()
 
     return build_response(event)
 
@@ -139,36 +170,68 @@ def get_event_details(
 @event_router.get(
     "/attendees/",
     name="event-attendees",
-    response_model=CustomResponse[list[EventAttendeeSchema]],
+    response_model=CustomResponse[Page[EventAttendeeSchema]],
 )
 def get_event_attendees(
-    request: Request, event: EventDep, repo: AttendeesRepoDep, staff_repo: StaffRepoDep
+    event: EventDep,
+    repo: AttendeesRepoDep,
+    auth: AuthContextDep,
+    page: PageParamsDep,
+    scanned: Annotated[
+        bool | None, Query(description="Only attendees whose tickets are or aren't scanned")
+    ] = None,
+    table_id: Annotated[
+        int | None, Query(description="Only attendees at this table")
+    ] = None,
 ):
     """
-    Gets the attendees of this event
+    Gets the attendees of this event a page at a time
     """
 
-    user: UserModel = request.user
-    staff = staff_repo.get_by_column(StaffModel.user_id == user.id)
-    if staff:
-        if event.company_id != staff.company_id:
+    if not auth.is_member_of(event.company_id):
+        raise UnauthorisedException()
+
+    criteria = [EventAttendeeModel.event_id == event.id]
+    if auth.has_role(StaffRole.scanner):
+        # Scanners only see who they've scanned
+        criteria.append(
+            EventAttendeeModel.ticket.has(EventTicketModel.scanned_by_id == auth.staff_id)
+        )
+
+    if scanned is not None:
+        is_scanned = EventTicketModel.scanned_by_id.isnot(None)
+        criteria.append(EventAttendeeModel.ticket.has(is_scanned if scanned else ~is_scanned))
+
+    if table_id is not None:
+        criteria.append(EventAttendeeModel.ticket.has(EventTicketModel.table_id == table_id))
+
+    attendees = repo.get_page(*criteria, page=page, profile="details")
+    return build_response(attendees)
+
+
+def get_attendee_company(
+    auth: AuthContext,
+    event: EventModel,
+    company_repo: CompaniesRepoDep,
+) -> CompanyModel:
+    """
+    Gets the company of the event if the user can add attendees to it
+    """
+
+    company_id = event.company_id
+    db_company = cast(CompanyModel, company_repo.get_by_id(company_id))
+    if db_company is None:
+        raise NotFoundException("This company does not exists")
+
+    if auth.is_staff:
+        if not (auth.has_role(StaffRole.creator) and auth.company_id == company_id):
             raise UnauthorisedException()
     else:
         # Check if user is owner
-        if cast(int, event.company.owner_id) != user.id:
+        if cast(int, db_company.owner_id) != auth.user.id:
             raise UnauthorisedException()
 
-    if staff and staff.has_role(StaffRole.scanner):
-        # attendees = repo.get_all(EventAttendeeModel.ticket.scanned_by_id == staff.id)
-        attendees = (
-            repo.query()
-            .join(EventTicketModel)
-            .filter(EventTicketModel.scanned_by_id == staff.id)
-        )
-    else:
-        attendees = repo.get_all(EventAttendeeModel.event_id == event.id)
-
-    return build_response(attendees)
+    return db_company
 
 
 @event_router.post(
@@ -177,33 +240,15 @@ def get_event_attendees(
     response_model=CustomResponse[EventAttendeeSchema],
 )
 def add_event_attendee(
-    request: Request,
     attendee_data: EventAttendeeCreateSchema,
     event: EventDep,
     repo: AttendeesRepoDep,
     table_repo: EventTablesRepoDep,
     company_repo: CompaniesRepoDep,
-    staff_repo: StaffRepoDep,
+    auth: AuthContextDep,
     background_task: BackgroundTasks,
 ):
-    user = request.user
-
-    company_id = event.company_id
-    db_company = cast(CompanyModel, company_repo.get_by_id(company_id))
-    if db_company is None:
-        raise NotFoundException("This company does not exists")
-
-    staff = staff_repo.get_by_column(StaffModel.user_id == user.id)
-    if staff:
-        if not (
-            staff.has_role(StaffRole.creator)
-            and cast(int, staff.company_id) == company_id
-        ):
-            raise UnauthorisedException()
-    else:
-        # Check if user is owner
-        if cast(int, db_company.owner_id) != user.id:
-            raise UnauthorisedException()
+    db_company = get_attendee_company(auth, event, company_repo)
 
     table_id = attendee_data.table_id
     table_name: str | None = None
@@ -213,40 +258,541 @@ def add_event_attendee(
             table_name = table.name
 
     attendee = repo.create_one(attendee_data, event, db_company, table_name)
-    if attendee is None:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Could not create the attendee",
-        )
-
     background_task.add_task(send_event_ticket, event.name, attendee.ticket.id)
     return build_response(attendee)
 
 
+def import_attendees(
+    rows: list[dict[str, Any]],
+    event: EventModel,
+    company: CompanyModel,
+    repo: AttendeesRepoDep,
+    table_repo: EventTablesRepoDep,
+    cache: CacheDep[dict[str, Any]],
+    background_task: BackgroundTasks,
+) -> EventAttendeeImportSchema:
+    if len(rows) > MAX_IMPORT_ROWS:
+        raise BadRequestException(
+            f"You can only import up to {MAX_IMPORT_ROWS} attendees at once"
+        )
+
+    event_tables = table_repo.get_all(EventTableModel.event_id == event.id) or []
+    tables = {table.id: table.name for table in event_tables}
+
+    results: dict[int, EventAttendeeImportRowSchema] = {}
+    valid_rows: list[tuple[int, EventAttendeeCreateSchema]] = []
+    for row, data in enumerate(rows, start=1):
+        try:
+            attendee_data = EventAttendeeCreateSchema.model_validate(data)
+        except ValidationError as e:
+            error = "; ".join(
+                f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}"
+                for err in e.errors()
+            )
+            email = data.get("email")
+            results[row] = EventAttendeeImportRowSchema(
+                row=row,
+                email=email if isinstance(email, str) else None,
+                created=False,
+                error=error,
+            )
+            continue
+
+        valid_rows.append((row, attendee_data))
+
+    created, errors = repo.create_many(valid_rows, event, tables)
+
+    job_id = uuid.uuid4().hex
+    tickets: list[tuple[int, str, list[dict]]] = []
+    for row, attendee_data in valid_rows:
+        email = attendee_data.email
+        if row in errors:
+            results[row] = EventAttendeeImportRowSchema(
+                row=row, email=email, created=False, error=errors[row]
+            )
+            continue
+
+        attendee_id, ticket_id, code = created[row]
+        results[row] = EventAttendeeImportRowSchema(
+            row=row, email=email, created=True, attendee_id=attendee_id, code=code
+        )
+
+        table_id = attendee_data.table_id
+        table_records = [
+            {
+                "name": attendee_data.name,
+                "price": attendee_data.price,
+                "table": tables[table_id] if table_id is not None else None,
+            }
+        ]
+        tickets.append((ticket_id, code, table_records))
+
+    # In lazy mode there's nothing to render, the tickets are rendered as
+    # their emails are sent
+    lazy = settings.ticket_render_mode == "lazy"
+    job = {
+        "job_id": job_id,
+        "status": "pending" if tickets and not lazy else "completed",
+        "total": len(tickets),
+        "rendered": 0,
+        "failed": 0,
+    }
+    cache.set(get_import_job_key(event.id, job_id), job, ttl=IMPORT_JOB_TTL)
+
+    if tickets and lazy:
+        background_task.add_task(
+            send_event_tickets,
+            event.name,
+            ticket_ids=[ticket_id for ticket_id, _, _ in tickets],
+        )
+    elif tickets:
+        background_task.add_task(
+            render_imported_tickets,
+            job_id,
+            logo=get_company_logo(company.id, company.logo_path),
+            event_name=event.name,
+            event_venue=event.venue,
+            event_date=event.date_from,
+            company_id=company.id,
+            event_id=event.id,
+            tickets=tickets,
+        )
+
+    return EventAttendeeImportSchema(
+        job_id=job_id,
+        created=len(created),
+        failed=len(rows) - len(created),
+        rows=[results[row] for row in sorted(results)],
+    )
+
+
+@event_router.post(
+    "/attendees/bulk/",
+    name="event-attendees-bulk-create",
+    response_model=CustomResponse[EventAttendeeImportSchema],
+)
+def add_event_attendees(
+    rows: Annotated[list[dict[str, Any]], Body()],
+    event: EventDep,
+    repo: AttendeesRepoDep,
+    table_repo: EventTablesRepoDep,
+    company_repo: CompaniesRepoDep,
+    auth: AuthContextDep,
+    cache: CacheDep[dict[str, Any]],
+    background_task: BackgroundTasks,
+):
+    """
+    Imports a list of attendees, their tickets are rendered in the background
+    """
+
+    company = get_attendee_company(auth, event, company_repo)
+    result = import_attendees(
+        rows, event, company, repo, table_repo, cache, background_task
+    )
+    return build_response(result)
+
+
+@event_router.post(
+    "/attendees/bulk/csv/",
+    name="event-attendees-bulk-csv-create",
+    response_model=CustomResponse[EventAttendeeImportSchema],
+)
+def add_event_attendees_csv(
+    file: Annotated[
+        UploadFile,
+        File(
+            description="A csv file with name, email, phone_number, price "
+            "and table (or table_id) columns"
+        ),
+    ],
+    event: EventDep,
+    repo: AttendeesRepoDep,
+    table_repo: EventTablesRepoDep,
+    company_repo: CompaniesRepoDep,
+    auth: AuthContextDep,
+    cache: CacheDep[dict[str, Any]],
+    background_task: BackgroundTasks,
+):
+    """
+    Imports attendees from a csv file, their tickets are rendered in the background
+    """
+
+    company = get_attendee_company(auth, event, company_repo)
+
+    try:
+        content = file.file.read().decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise BadRequestException("The file should be a utf-8 encoded csv file")
+
+    event_tables = table_repo.get_all(EventTableModel.event_id == event.id) or []
+    table_ids = {table.name: table.id for table in event_tables}
+    rows: list[dict[str, Any]] = []
+    for record in csv.DictReader(io.StringIO(content)):
+        row: dict[str, Any] = {
+            key.strip(): value.strip() or None
+            for key, value in record.items()
+            if key is not None and value is not None
+        }
+
+        table_name = row.pop("table", None)
+        if table_name is not None and row.get("table_id") is None:
+            # Unknown tables are reported by the import
+            row["table_id"] = table_ids.get(table_name, -1)
+
+        rows.append(row)
+
+    result = import_attendees(
+        rows, event, company, repo, table_repo, cache, background_task
+    )
+    return build_response(result)
+
+
+@event_router.get(
+    "/attendees/bulk/{job_id}/",
+    name="event-attendees-bulk-job",
+    response_model=CustomResponse[EventAttendeeImportJobSchema],
+)
+def get_event_attendees_import(
+    job_id: Annotated[str, Path(description="The id of the import job")],
+    event: EventDep,
+    company_repo: CompaniesRepoDep,
+    auth: AuthContextDep,
+    cache: CacheDep[dict[str, Any]],
+):
+    """
+    Gets the ticket rendering progress of an attendee import
+    """
+
+    get_attendee_company(auth, event, company_repo)
+
+    job = cache.get(get_import_job_key(event.id, job_id))
+    if job is None:
+        raise NotFoundException("This import does not exist")
+
+    return build_response(job)
+
+
+def check_event_not_ended(event: EventModel):
+    event_end = cast(datetime, event.date_to) + timedelta(days=1)
+    now = datetime.now(pendulum.UTC)
+    if event.status == EventStatus.ended or now > event_end:
+        raise BadRequestException("This event has ended")
+
+
+def check_event_scanner(auth: AuthContext, event: EventModel):
+    """
+    Checks if the user is staff that can scan the tickets of the event
+    """
+
+    if not auth.is_staff:
+        raise UnauthorisedException()
+
+    if event.company_id != auth.company_id:
+        raise UnauthorisedException()
+
+
 @event_router.post(
     "/ticket-scan/",
     name="ticket-scan",
     response_model=CustomResponse[EventAttendeeSchema],
 )
 def scan_ticket(
-    request: Request,
     code: Annotated[str, Body(embed=True)],
     event: EventDep,
     repo: TicketsRepoDep,
-    staff_repo: StaffRepoDep,
+    auth: AuthContextDep,
     background_task: BackgroundTasks,
 ):
-    event_end = cast(datetime, event.date_to) + timedelta(days=1)
+    check_event_not_ended(event)
+    check_event_scanner(auth, event)
+
+    if settings.scan_state_enabled:
+        now = datetime.now(pendulum.UTC)
+        cached = scan_tickets_in_cache(
+            repo.db, event.id, {code: now}, auth.staff_id, auth.user.name
+        )
+        if cached is not None and code in cached:
+            scan_status, data = cached[code]
+            if scan_status == ScanStateCache.duplicate:
+                raise BadRequestException(
+                    "This ticket has already been scanned",
+                    data={"at": data["at"], "by": data["by"]},
+                )
+
+            background_task.add_task(flush_ticket_scans, event.id, event.name)
+            return build_response(data)
+
+    attendee = repo.scan_ticket(event.id, code, scanned_by_id=auth.staff_id)
+    if attendee is None:
+        scan = repo.get_scan(event.id, code)
+        if scan is None:
+            raise NotFoundException("This ticket was not found")
+
+        raise BadRequestException(
+            "This ticket has already been scanned",
+            data={"at": scan.scanned_at, "by": scan.name},
+        )
+
+    if settings.scan_state_enabled:
+        record_ticket_scans(
+            event.id, {code: attendee.ticket.scanned_at}, auth.staff_id, auth.user.name
+        )
+
+    background_task.add_task(publish_ticket_scans, event.id, [attendee.ticket.id])
+    background_task.add_task(notify_user_of_ticket_scan, event.name, attendee.ticket.id)
+    return build_response(attendee)
+
+
+def scan_tickets(
+    scans: list[EventTicketScanSchema],
+    event: EventModel,
+    auth: AuthContext,
+    repo: TicketsRepoDep,
+    background_task: BackgroundTasks,
+) -> list[EventTicketScanResultSchema]:
+    """
+    Scans many tickets at once, returning the result of every code
+    """
+
+    # A code scanned more than once counts from its first scan, and scans
+    # can't be in the future
     now = datetime.now(pendulum.UTC)
-    if event.status == EventStatus.ended or now > event_end:
-        raise BadRequestException("This event has ended")
+    first_scans: dict[str, datetime] = {}
+    for scan in scans:
+        scanned_at = scan.scanned_at
+        if scanned_at.tzinfo is None:
+            scanned_at = scanned_at.replace(tzinfo=pendulum.UTC)
+
+        scanned_at = min(scanned_at, now)
+        if scan.code not in first_scans or scanned_at < first_scans[scan.code]:
+            first_scans[scan.code] = scanned_at
+
+    cached: dict[str, tuple[int, dict]] = {}
+    if settings.scan_state_enabled:
+        cached = scan_tickets_in_cache(
+            repo.db, event.id, first_scans, auth.staff_id, auth.user.name
+        ) or {}
+        if cached:
+            background_task.add_task(flush_ticket_scans, event.id, event.name)
+
+    db_scans = {
+        code: scanned_at
+        for code, scanned_at in first_scans.items()
+        if code not in cached
+    }
+    scanned = repo.scan_many(event.id, db_scans, scanned_by_id=auth.staff_id)
+    if settings.scan_state_enabled:
+        record_ticket_scans(
+            event.id,
+            {code: db_scans[code] for code in scanned},
+            auth.staff_id,
+            auth.user.name,
+        )
+    if scanned:
+        background_task.add_task(publish_ticket_scans, event.id, list(scanned.values()))
+    previous_scans = repo.get_scans(
+        event.id, [code for code in db_scans if code not in scanned]
+    )
 
-    user = request.user
-    staff = staff_repo.get_by_column(StaffModel.user_id == user.id)
-    if not staff:
-        raise UnauthorisedException()
+    results: list[EventTicketScanResultSchema] = []
+    for code, scanned_at in first_scans.items():
+        if code in cached:
+            # Attendees of scans decided in redis are notified once the
+            # scans are flushed
+            scan_status, data = cached[code]
+            if scan_status == ScanStateCache.scanned:
+                scan_result = EventTicketScanResultSchema(
+                    code=code,
+                    status="scanned",
+                    scanned_at=scanned_at,
+                    scanned_by=auth.user.name,
+                )
+            else:
+                scan_result = EventTicketScanResultSchema(
+                    code=code,
+                    status="duplicate",
+                    scanned_at=data["at"],
+                    scanned_by=data["by"],
+                )
+            results.append(scan_result)
+        elif code in scanned:
+            results.append(
+                EventTicketScanResultSchema(
+                    code=code,
+                    status="scanned",
+                    scanned_at=scanned_at,
+                    scanned_by=auth.user.name,
+                )
+            )
+            background_task.add_task(
+                notify_user_of_ticket_scan, event.name, scanned[code]
+            )
+        elif code in previous_scans:
+            scan = previous_scans[code]
+            results.append(
+                EventTicketScanResultSchema(
+                    code=code,
+                    status="duplicate",
+                    scanned_at=scan.scanned_at,
+                    scanned_by=scan.name,
+                )
+            )
+        else:
+            results.append(EventTicketScanResultSchema(code=code, status="not_found"))
+
+    return results
+
+
+@event_router.post(
+    "/ticket-scan/batch/",
+    name="ticket-scan-batch",
+    response_model=CustomResponse[list[EventTicketScanResultSchema]],
+)
+def scan_ticket_batch(
+    scans_data: EventTicketScansSchema,
+    event: EventDep,
+    repo: TicketsRepoDep,
+    auth: AuthContextDep,
+    background_task: BackgroundTasks,
+):
+    """
+    Scans the tickets a gate queued up while it was busy.
+
+    Unlike ticket-scan, a ticket that was already scanned doesn't fail the
+    request, it's returned as a duplicate.
+    """
+
+    check_event_not_ended(event)
+    check_event_scanner(auth, event)
+
+    if len(scans_data.scans) > MAX_BATCH_SCANS:
+        raise BadRequestException(
+            f"Only {MAX_BATCH_SCANS} tickets can be scanned at once"
+        )
+
+    results = scan_tickets(scans_data.scans, event, auth, repo, background_task)
+    return build_response(results)
+
+
+@event_router.get(
+    "/tickets/manifest/",
+    name="ticket-manifest",
+    response_model=CustomResponse[EventTicketManifestSchema],
+)
+def get_ticket_manifest(
+    event: EventDep,
+    repo: TicketsRepoDep,
+    auth: AuthContextDep,
+    device_id: ManifestDeviceIdQuery,
+):
+    """
+    Gets the tickets of this event so they can be scanned offline.
 
-    if event.company_id != staff.company_id:
+    Ticket codes are hashed, the scanner hashes the code it reads with the
+    key of its device, see ticket-manifest-key, and looks the hash up in the
+    sorted tickets.
+    """
+
+    check_event_scanner(auth, event)
+
+    key = get_manifest_key(event.id, auth.staff_id, device_id)
+    tickets = sorted(
+        (
+            EventTicketManifestEntrySchema(
+                hash=hash_ticket_code(key, code),
+                name=name,
+                table=table,
+                scanned=scanned_at is not None,
+            )
+            for code, name, table, scanned_at in repo.get_manifest(event.id)
+        ),
+        key=lambda ticket: ticket.hash,
+    )
+    version = hashlib.sha256(
+        "".join(f"{ticket.hash}{int(ticket.scanned)}" for ticket in tickets).encode()
+    ).hexdigest()[:16]
+
+    manifest = EventTicketManifestSchema(
+        event_id=event.id,
+        device_id=device_id,
+        version=version,
+        generated_at=datetime.now(pendulum.UTC),
+        tickets=tickets,
+    )
+    return build_response(manifest)
+
+
+@event_router.get(
+    "/tickets/manifest/key/",
+    name="ticket-manifest-key",
+    response_model=CustomResponse[EventTicketManifestKeySchema],
+)
+def get_ticket_manifest_key(
+    event: EventDep,
+    auth: AuthContextDep,
+    device_id: ManifestDeviceIdQuery,
+):
+    """
+    Gets the key a device hashes ticket codes with to check them against
+    its manifest.
+
+    The key should be kept apart from the manifest, anyone with both can
+    find every ticket code.
+    """
+
+    check_event_scanner(auth, event)
+
+    manifest_key = EventTicketManifestKeySchema(
+        event_id=event.id,
+        device_id=device_id,
+        key=get_manifest_key(event.id, auth.staff_id, device_id),
+    )
+    return build_response(manifest_key)
+
+
+@event_router.post(
+    "/tickets/sync/",
+    name="ticket-sync",
+    response_model=CustomResponse[list[EventTicketScanResultSchema]],
+)
+def sync_ticket_scans(
+    scans_data: EventTicketScansSchema,
+    event: EventDep,
+    repo: TicketsRepoDep,
+    auth: AuthContextDep,
+    background_task: BackgroundTasks,
+):
+    """
+    Uploads the ticket scans made offline.
+
+    Tickets that were scanned in the meantime are returned as duplicates
+    along with who scanned them first. The scan that reached the server
+    first is kept, even if this device scanned the ticket earlier.
+    """
+
+    check_event_scanner(auth, event)
+
+    if len(scans_data.scans) > MAX_SYNC_SCANS:
+        raise BadRequestException(
+            f"Only {MAX_SYNC_SCANS} scans can be uploaded at once"
+        )
+
+    results = scan_tickets(scans_data.scans, event, auth, repo, background_task)
+    return build_response(results)
+
+
+@event_router.get("/tickets/{code}/pdf/", name="ticket-pdf")
+def get_ticket_pdf_file(
+    code: str,
+    event: EventDep,
+    repo: TicketsRepoDep,
+    auth: AuthContextDep,
+):
+    """
+    Downloads the pdf of a ticket, rendering it if it hasn't been yet
+    """
+
+    if not auth.is_member_of(event.company_id):
         raise UnauthorisedException()
 
     ticket = repo.get_by_column(
@@ -255,45 +801,54 @@ def scan_ticket(
     if ticket is None:
         raise NotFoundException("This ticket was not found")
 
-    if ticket.is_scanned:
-        raise BadRequestException(
-            "This ticket has already been scanned",
-            data={"at": ticket.scanned_at, "by": ticket.scanned_by.user.name},
-        )
+    content = get_ticket_pdf(repo.db, ticket)
+    filename = f"ticket_{event.id}_{ticket.code}.pdf"
+    return Response(
+        content,
+        media_type="application/pdf",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
-    ticket = repo.scan_ticket(ticket, scanned_by_id=staff.id)
-    attendee = ticket.attendee
 
-    background_task.add_task(notify_user_of_ticket_scan, event.name, attendee.ticket.id)
-    return build_response(attendee)
+@event_router.get("/checkins/stream/", name="event-checkins-stream")
+def stream_event_checkins(event: EventDep, auth: AuthContextDep):
+    """
+    Streams the check-ins of this event as server-sent events.
+
+    A "counts" event holds the scanned and total tickets of the event and of
+    each table, it's sent first and whenever they change. A "checkin" event
+    is sent for every scanned ticket.
+    """
+
+    if not auth.is_member_of(event.company_id):
+        raise UnauthorisedException()
+
+    return StreamingResponse(
+        stream_checkins(event.id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @event_router.get(
     "/tables/",
     name="event-tables",
-    response_model=CustomResponse[list[EventTableSchema]],
+    response_model=CustomResponse[Page[EventTableSchema]],
 )
 def get_event_tables(
-    request: Request,
     event: EventDep,
     repo: EventTablesRepoDep,
-    staff_repo: StaffRepoDep,
+    auth: AuthContextDep,
+    page: PageParamsDep,
 ):
     """
-    Gets the attendees of this event
+    Gets the tables of this event a page at a time
     """
 
-    user: UserModel = request.user
-    staff = staff_repo.get_by_column(StaffModel.user_id == user.id)
-    if staff:
-        if event.company_id != staff.company_id:
-            raise UnauthorisedException()
-    else:
-        # Check if user is owner
-        if cast(int, event.company.owner_id) != user.id:
-            raise UnauthorisedException()
+    if not auth.is_member_of(event.company_id):
+        raise UnauthorisedException()
 
-    tables = repo.get_all(EventTableModel.event_id == event.id)
+    tables = repo.get_page(EventTableModel.event_id == event.id, page=page)
     return build_response(tables)
 
 
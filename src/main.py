@@ -1,9 +1,17 @@
-from fastapi import APIRouter, FastAPI, HTTPException, status
+import hmac
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, FastAPI, Header, HTTPException, status
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.authentication import AuthenticationMiddleware
 
+from src.common.exceptions import NotFoundException, UnauthorisedException
+from src.core.auth.auth import get_hashing_metrics
 from src.core.auth.backend import BearerTokenAuthBackend
+from src.core.cache import get_cache_metrics
+from src.core.config import settings
+from src.core.database import get_async_engine
 from src.core.exceptions import handle_http_exception, handle_validation_error
 from src.features.auth.v1 import router as auth_router
 from src.features.companies.v1 import router as companies_router
@@ -18,6 +26,9 @@ v1_router.include_router(auth_router.router)
 v1_router.include_router(companies_router.router)
 v1_router.include_router(events_router.router)
 
+# Made now so a database without an async driver fails at startup
+get_async_engine()
+
 app = FastAPI()
 
 app.mount('/static', StaticFiles(directory='static'), name='static')
@@ -40,3 +51,22 @@ app.include_router(v1_router)
 @app.get("/")
 def root():
     return {'msg': 'Welcome to the api'}
+
+
+def check_metrics_token(authorization: Annotated[str | None, Header()] = None):
+    # Metrics show the internals of the server, so they're only served to
+    # whoever has the token
+    if not settings.metrics_token:
+        raise NotFoundException()
+
+    expected = f'Bearer {settings.metrics_token}'
+    if authorization is None or not hmac.compare_digest(authorization.encode(), expected.encode()):
+        raise UnauthorisedException()
+
+
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(check_metrics_token)])
+def metrics():
+    return {
+        'password_hashing': get_hashing_metrics(),
+        'cache': get_cache_metrics(),
+    }